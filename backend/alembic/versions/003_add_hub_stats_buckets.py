@@ -0,0 +1,37 @@
+"""Add hub_stats_buckets rollup table for time-series analytics
+
+Revision ID: 003_hub_stats_buckets
+Revises: 002_cascade_delete
+Create Date: 2026-10-19
+
+Stores visit/click counts per hub in 15-minute buckets so long analytics
+windows are served from rollups instead of grouping raw event rows.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '003_hub_stats_buckets'
+down_revision = '002_cascade_delete'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'hub_stats_buckets',
+        sa.Column('hub_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('bucket_start', sa.BigInteger(), nullable=False),
+        sa.Column('visits', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('clicks', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['hub_id'], ['hubs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('hub_id', 'bucket_start')
+    )
+    op.create_index('ix_hub_stats_buckets_bucket_start', 'hub_stats_buckets', ['bucket_start'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_hub_stats_buckets_bucket_start', table_name='hub_stats_buckets')
+    op.drop_table('hub_stats_buckets')
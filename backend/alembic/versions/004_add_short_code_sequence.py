@@ -0,0 +1,29 @@
+"""Add short_code_seq for collision-free short code generation
+
+Revision ID: 004_short_code_seq
+Revises: 003_hub_stats_buckets
+Create Date: 2026-10-19
+
+New short codes are a keyed permutation of values drawn from this
+sequence. They are 7 characters long, so they can't clash with existing
+random 6 (or 8) character codes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '004_short_code_seq'
+down_revision = '003_hub_stats_buckets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(
+        sa.Sequence('short_code_seq', start=1, minvalue=1, maxvalue=62 ** 7 - 1)
+    ))
+
+
+def downgrade() -> None:
+    op.execute(sa.schema.DropSequence(sa.Sequence('short_code_seq')))
@@ -0,0 +1,47 @@
+"""Allow short URLs that target an individual link
+
+Revision ID: 005_link_short_urls
+Revises: 004_short_code_seq
+Create Date: 2026-10-19
+
+Adds short_urls.link_id. A hub keeps at most one hub-level short URL
+(link_id IS NULL), enforced by a partial unique index instead of the
+unique constraint on hub_id; each link can have one short URL of its own.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '005_link_short_urls'
+down_revision = '004_short_code_seq'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('short_urls', sa.Column('link_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_foreign_key(
+        'short_urls_link_id_fkey', 'short_urls', 'links',
+        ['link_id'], ['id'], ondelete='CASCADE'
+    )
+    op.create_unique_constraint('short_urls_link_id_key', 'short_urls', ['link_id'])
+    
+    op.drop_constraint('short_urls_hub_id_key', 'short_urls', type_='unique')
+    op.create_index('ix_short_urls_hub_id', 'short_urls', ['hub_id'])
+    op.create_index(
+        'uq_short_urls_hub_id_hub_level', 'short_urls', ['hub_id'],
+        unique=True, postgresql_where=sa.text('link_id IS NULL')
+    )
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM short_urls WHERE link_id IS NOT NULL")
+    op.drop_index('uq_short_urls_hub_id_hub_level', table_name='short_urls')
+    op.drop_index('ix_short_urls_hub_id', table_name='short_urls')
+    op.create_unique_constraint('short_urls_hub_id_key', 'short_urls', ['hub_id'])
+    
+    op.drop_constraint('short_urls_link_id_key', 'short_urls', type_='unique')
+    op.drop_constraint('short_urls_link_id_fkey', 'short_urls', type_='foreignkey')
+    op.drop_column('short_urls', 'link_id')
@@ -0,0 +1,37 @@
+"""Add per-short-URL redirect policy
+
+Revision ID: 006_short_url_redirect_policy
+Revises: 005_link_short_urls
+Create Date: 2026-10-19
+
+redirect_status selects the HTTP status of /s/{code} redirects:
+301/308 are sent with a public max-age (cache_max_age, capped by
+settings), 302/307 with no-store.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006_short_url_redirect_policy'
+down_revision = '005_link_short_urls'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'short_urls',
+        sa.Column('redirect_status', sa.SmallInteger(), server_default='307', nullable=False)
+    )
+    op.add_column('short_urls', sa.Column('cache_max_age', sa.Integer(), nullable=True))
+    op.create_check_constraint(
+        'ck_short_urls_redirect_status', 'short_urls',
+        'redirect_status IN (301, 302, 307, 308)'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('ck_short_urls_redirect_status', 'short_urls', type_='check')
+    op.drop_column('short_urls', 'cache_max_age')
+    op.drop_column('short_urls', 'redirect_status')
@@ -0,0 +1,33 @@
+"""Grant admin access by flag and make emails case-insensitive
+
+Revision ID: 007_user_admin_flag
+Revises: 006_short_url_redirect_policy
+Create Date: 2026-10-19
+
+users.is_admin replaces the ADMIN_EMAILS setting, which matched
+self-declared (unverified) addresses. The unique index on lower(email)
+stops the same address being registered again with different case; it
+fails if such duplicates already exist, which must be merged first.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '007_user_admin_flag'
+down_revision = '006_short_url_redirect_policy'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        sa.Column('is_admin', sa.Boolean(), server_default=sa.false(), nullable=False)
+    )
+    op.create_index('uq_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_users_email_lower', table_name='users')
+    op.drop_column('users', 'is_admin')
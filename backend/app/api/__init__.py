@@ -2,7 +2,7 @@
 Smart Link Hub - API Package
 """
 from fastapi import APIRouter
-from app.api import auth, hubs, links, rules, public, tracking, analytics, redirect
+from app.api import auth, hubs, links, rules, public, tracking, analytics, redirect, qr, admin
 
 # Create main API router
 api_router = APIRouter(prefix="/api")
@@ -15,6 +15,8 @@ api_router.include_router(rules.router)
 api_router.include_router(public.router)
 api_router.include_router(tracking.router)
 api_router.include_router(analytics.router)
+api_router.include_router(qr.router)
+api_router.include_router(admin.router)
 
 # Redirect router (no /api prefix - goes at root level)
 redirect_router = redirect.router
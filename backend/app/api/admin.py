@@ -0,0 +1,33 @@
+"""
+Smart Link Hub - Admin API Routes
+Operational endpoints for users with the is_admin flag
+"""
+from fastapi import APIRouter, Depends, Query
+
+from app.config import settings
+from app.models.user import User
+from app.utils.slow_query_log import slow_query_log
+from app.api.deps import get_admin_user
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=200),
+    admin: User = Depends(get_admin_user)
+):
+    """
+    Latest slow statements recorded by the worker serving this request
+
+    Each entry has the statement, its duration, the route that ran it,
+    the types of its bound parameters and its EXPLAIN plan. Entries of
+    all workers are in the slow query log files, one per worker process
+    (SLOW_QUERY_LOG_PATH with the worker's PID added).
+    """
+    return {
+        "threshold_ms": settings.SLOW_QUERY_MS,
+        "sample_rate": settings.SLOW_QUERY_SAMPLE_RATE,
+        "log_file": slow_query_log.worker_path(),
+        "queries": slow_query_log.recent(limit)
+    }
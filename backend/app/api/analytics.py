@@ -2,20 +2,25 @@
 Smart Link Hub - Analytics API Routes
 Analytics data retrieval for dashboard
 """
+from datetime import date
+from typing import Optional
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_analytics_db
 from app.models.user import User
 from app.models.hub import Hub
 from app.schemas.analytics import (
-    AnalyticsSummary, LinkPerformanceList, DailyStatsResponse, TopLinksResponse
+    AnalyticsSummary, LinkPerformanceList, DailyStatsResponse, TimeSeriesResponse,
+    TopLinksResponse, AccountOverviewResponse, ReportJobResponse
 )
 from app.services.analytics_service import AnalyticsService
-from app.api.deps import get_current_user, rate_limit_check
+from app.services.live_service import live_analytics, LiveCapacityError
+from app.services.report_jobs import report_jobs
+from app.api.deps import get_current_user
 
-router = APIRouter(prefix="/analytics", tags=["Analytics"], dependencies=[Depends(rate_limit_check)])
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 
 def verify_hub_ownership(hub_id: UUID, user_id: UUID, db: Session) -> Hub:
@@ -29,12 +34,38 @@ def verify_hub_ownership(hub_id: UUID, user_id: UUID, db: Session) -> Hub:
     return hub
 
 
+@router.get("/overview", response_model=AccountOverviewResponse)
+async def get_account_overview(
+    days: int = Query(30, ge=1, le=365),
+    tz: str = Query("UTC", description="IANA timezone name used for sparkline days"),
+    sort: str = Query("visits", pattern="^(visits|clicks|ctr|title)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    """
+    Get visits, clicks, CTR and a daily sparkline for all of the user's hubs
+    
+    Computed with a fixed number of grouped queries, sorted server-side.
+    """
+    analytics = AnalyticsService(db)
+    try:
+        data = analytics.get_account_overview(str(current_user.id), days, tz, sort, order)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return AccountOverviewResponse(**data)
+
+
 @router.get("/hubs/{hub_id}", response_model=AnalyticsSummary)
 async def get_hub_analytics(
     hub_id: UUID,
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get analytics summary for a hub
@@ -58,7 +89,7 @@ async def get_link_performance(
     hub_id: UUID,
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get performance metrics for all links in a hub
@@ -82,7 +113,7 @@ async def get_daily_stats(
     hub_id: UUID,
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get daily visit and click statistics
@@ -100,13 +131,82 @@ async def get_daily_stats(
     )
 
 
+@router.get("/hubs/{hub_id}/timeseries", response_model=TimeSeriesResponse)
+async def get_time_series(
+    hub_id: UUID,
+    days: int = Query(30, ge=1, le=365),
+    granularity: str = Query("day", pattern="^(hour|day|week|month)$"),
+    tz: str = Query("UTC", description="IANA timezone name, e.g. Asia/Kolkata"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    """
+    Get visit, click and CTR time series for charting
+    
+    - **granularity**: hour, day, week or month
+    - **tz**: Timezone used to align bucket boundaries
+    
+    Every bucket in the period is present (empty buckets are zero).
+    """
+    verify_hub_ownership(hub_id, current_user.id, db)
+    
+    analytics = AnalyticsService(db)
+    try:
+        series = analytics.get_time_series(str(hub_id), days, granularity, tz)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return TimeSeriesResponse(**series)
+
+
+@router.get("/hubs/{hub_id}/live")
+async def stream_live_analytics(
+    hub_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    """
+    Stream live visit/click counters as Server-Sent Events
+    
+    Sends a `snapshot` event with the last 60 seconds on connect, then a
+    `tick` event every second with that second's counts and new events.
+    Served from memory; no database reads after the ownership check.
+    """
+    from fastapi.responses import StreamingResponse
+    
+    verify_hub_ownership(hub_id, current_user.id, db)
+    # Release the pooled connection; the stream may stay open for hours
+    db.close()
+    
+    try:
+        subscriber = live_analytics.subscribe(str(hub_id))
+    except LiveCapacityError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    
+    return StreamingResponse(
+        live_analytics.stream(subscriber),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 @router.get("/hubs/{hub_id}/top-links", response_model=TopLinksResponse)
 async def get_top_and_bottom_links(
     hub_id: UUID,
     days: int = Query(30, ge=1, le=365),
     limit: int = Query(5, ge=1, le=20),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Get top performing and least performing links
@@ -133,7 +233,7 @@ async def export_analytics_csv(
     hub_id: UUID,
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
     Export analytics data as CSV file.
@@ -177,50 +277,213 @@ async def export_analytics_csv(
     )
 
 
-@router.get("/hubs/{hub_id}/export/pdf")
-async def export_analytics_pdf(
+@router.get("/hubs/{hub_id}/export/events.csv")
+async def export_events_csv(
     hub_id: UUID,
     days: int = Query(30, ge=1, le=365),
+    gzip: bool = Query(False, description="Compress the CSV on the fly"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_analytics_db)
 ):
     """
-    Export analytics data as PDF report.
+    Export every raw visit and click event as a streamed CSV file.
     
-    Professional styled report with summary, charts data, and link performance tables.
+    Rows are streamed from a server-side cursor, so large hubs export in
+    constant memory. Set `gzip=true` to download a `.csv.gz` file.
     """
-    from fastapi.responses import Response
+    from fastapi.responses import StreamingResponse
     from datetime import datetime, timedelta
-    from app.services.export_service import generate_pdf_report
+    from app.services.export_service import stream_events_csv
     
     hub = verify_hub_ownership(hub_id, current_user.id, db)
-    
-    analytics = AnalyticsService(db)
-    
-    # Gather all data
-    analytics_data = analytics.get_hub_analytics(str(hub_id), days)
-    link_performance = analytics.get_link_performance(str(hub_id), days)
-    daily_stats = analytics.get_daily_stats(str(hub_id), days)
+    # The stream uses its own session; don't hold this one's connection too
+    db.close()
     
     end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
+    filename = f"{hub.slug}-events-{end_date.strftime('%Y%m%d')}.csv"
+    if gzip:
+        filename += ".gz"
     
-    pdf_bytes = generate_pdf_report(
-        hub_title=hub.title,
-        hub_slug=hub.slug,
-        analytics_data=analytics_data,
-        link_performance=link_performance,
-        daily_stats=daily_stats,
-        start_date=start_date,
-        end_date=end_date
+    return StreamingResponse(
+        stream_events_csv(str(hub_id), start_date, end_date, compress=gzip),
+        media_type="application/gzip" if gzip else "text/csv",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"'
+        }
     )
+
+
+@router.get("/hubs/{hub_id}/export/columnar")
+async def export_events_columnar(
+    hub_id: UUID,
+    table: str = Query("visits", pattern="^(visits|clicks)$"),
+    file_format: str = Query("parquet", alias="format", pattern="^(parquet|arrow)$"),
+    start_date: Optional[date] = Query(None, description="First day (UTC), defaults to 30 days ago"),
+    end_date: Optional[date] = Query(None, description="Last day (UTC, inclusive), defaults to today"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    """
+    Export raw visits or clicks as a Parquet or Arrow IPC file.
     
-    filename = f"{hub.slug}-analytics-{end_date.strftime('%Y%m%d')}.pdf"
+    Typed columns (timestamps, dictionary-encoded device/country) load
+    directly into pandas, DuckDB or a warehouse without CSV parsing.
+    Streamed one row group at a time.
+    """
+    from fastapi.responses import StreamingResponse
+    from datetime import datetime, time, timedelta
+    from app.services.export_service import stream_events_columnar
     
-    return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Columnar export requires pyarrow"
+        )
+    
+    hub = verify_hub_ownership(hub_id, current_user.id, db)
+    db.close()
+    
+    end_date = end_date or datetime.utcnow().date()
+    start_date = start_date or end_date - timedelta(days=30)
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
+    
+    extension = "parquet" if file_format == "parquet" else "arrow"
+    filename = f"{hub.slug}-{table}-{start_date:%Y%m%d}-{end_date:%Y%m%d}.{extension}"
+    
+    return StreamingResponse(
+        stream_events_columnar(
+            table,
+            datetime.combine(start_date, time.min),
+            datetime.combine(end_date + timedelta(days=1), time.min),
+            hub_id=str(hub_id),
+            file_format=file_format
+        ),
+        media_type="application/vnd.apache.parquet" if file_format == "parquet"
+        else "application/vnd.apache.arrow.file",
         headers={
             "Content-Disposition": f'attachment; filename="{filename}"'
         }
     )
+
+
+@router.get("/hubs/{hub_id}/export/pdf")
+async def export_analytics_pdf(
+    hub_id: UUID,
+    days: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    """
+    Export analytics data as PDF report.
+    
+    Professional styled report with summary, charts data, and link performance tables.
+    Rendered off the event loop and served from the report cache when the
+    underlying data hasn't changed.
+    """
+    from fastapi.responses import FileResponse
+    
+    hub = verify_hub_ownership(hub_id, current_user.id, db)
+    job = report_jobs.submit(db, hub, days)
+    db.close()
+    
+    await report_jobs.wait(job)
+    if job.status != "done":
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Report generation failed"
+        )
+    
+    return FileResponse(
+        report_jobs.artifact_path(job.hub_id, job.job_id),
+        media_type="application/pdf",
+        filename=job.filename
+    )
+
+
+@router.post(
+    "/hubs/{hub_id}/export/pdf/jobs",
+    response_model=ReportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def create_pdf_export_job(
+    hub_id: UUID,
+    days: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    """
+    Queue a PDF report for background rendering.
+    
+    Poll the returned job's status, then fetch it from the download URL.
+    Reports for unchanged data are returned as already done.
+    """
+    hub = verify_hub_ownership(hub_id, current_user.id, db)
+    job = report_jobs.submit(db, hub, days)
+    return _report_job_response(job)
+
+
+@router.get("/hubs/{hub_id}/export/pdf/jobs/{job_id}", response_model=ReportJobResponse)
+async def get_pdf_export_job(
+    hub_id: UUID,
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    """
+    Get the status and progress of a PDF export job
+    """
+    hub = verify_hub_ownership(hub_id, current_user.id, db)
+    job = report_jobs.get(job_id, hub)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found"
+        )
+    return _report_job_response(job)
+
+
+@router.get("/hubs/{hub_id}/export/pdf/jobs/{job_id}/download")
+async def download_pdf_export_job(
+    hub_id: UUID,
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_analytics_db)
+):
+    """
+    Download the PDF produced by a finished export job
+    """
+    from fastapi.responses import FileResponse
+    
+    hub = verify_hub_ownership(hub_id, current_user.id, db)
+    job = report_jobs.get(job_id, hub)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Export job not found"
+        )
+    if job.status != "done":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Export job is {job.status}"
+        )
+    
+    return FileResponse(
+        report_jobs.artifact_path(job.hub_id, job.job_id),
+        media_type="application/pdf",
+        filename=job.filename
+    )
+
+
+def _report_job_response(job) -> ReportJobResponse:
+    """Build the API representation of a report job"""
+    download_url = None
+    if job.status == "done":
+        download_url = f"/api/analytics/hubs/{job.hub_id}/export/pdf/jobs/{job.job_id}/download"
+    return ReportJobResponse(**job.to_dict(), download_url=download_url)
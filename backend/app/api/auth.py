@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 from app.services.auth_service import AuthService
+from app.services.password_hasher import PasswordHasherBusyError
 from app.api.deps import get_current_user
 from app.models.user import User
 
@@ -26,7 +27,14 @@ async def register(
     - **name**: User's display name
     """
     auth_service = AuthService(db)
-    user, error = auth_service.register(user_data)
+    try:
+        user, error = await auth_service.register(user_data)
+    except PasswordHasherBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     
     if error:
         raise HTTPException(
@@ -48,7 +56,14 @@ async def login(
     Returns JWT access token and refresh token
     """
     auth_service = AuthService(db)
-    tokens, error = auth_service.login(credentials)
+    try:
+        tokens, error = await auth_service.login(credentials)
+    except PasswordHasherBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     
     if error:
         raise HTTPException(
@@ -2,37 +2,25 @@
 Smart Link Hub - API Dependencies
 Common dependencies for API routes
 """
-from typing import Optional
+from typing import AsyncIterator, Optional
+from uuid import UUID
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.models.user import User
-from app.utils.security import verify_access_token
-from app.utils.rate_limiter import api_rate_limiter, public_rate_limiter
+from app.services.auth_cache import token_cache, principal_cache
+from app.services.hub_quotas import hub_quotas
+from app.utils.rate_limit_middleware import get_scope_client_ip
 
 # Security scheme for JWT
 security = HTTPBearer()
 
 
 def get_client_ip(request: Request) -> str:
-    """Extract client IP from request"""
-    # Check X-Forwarded-For header (for proxies)
-    forwarded = request.headers.get("X-Forwarded-For")
-    if forwarded:
-        return forwarded.split(",")[0].strip()
-    
-    # Check X-Real-IP header
-    real_ip = request.headers.get("X-Real-IP")
-    if real_ip:
-        return real_ip
-    
-    # Fall back to client host
-    if request.client:
-        return request.client.host
-    
-    return "unknown"
+    """Extract client IP from request (forwarded headers only from TRUSTED_PROXIES)"""
+    return get_scope_client_ip(request.scope)
 
 
 async def get_current_user(
@@ -42,11 +30,14 @@ async def get_current_user(
     """
     Dependency to get the current authenticated user
     
+    Verified tokens and users are cached, so repeat requests with the same
+    token skip both the signature check and the user query.
+    
     Raises:
         HTTPException: If token is invalid or user not found
     """
     token = credentials.credentials
-    user_id = verify_access_token(token)
+    user_id = token_cache.verify(token)
     
     if not user_id:
         raise HTTPException(
@@ -55,7 +46,7 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = principal_cache.get(db, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -78,45 +69,54 @@ async def get_optional_user(
         return None
     
     token = auth_header.replace("Bearer ", "")
-    user_id = verify_access_token(token)
+    user_id = token_cache.verify(token)
     
     if not user_id:
         return None
     
-    return db.query(User).filter(User.id == user_id).first()
+    return principal_cache.get(db, user_id)
 
 
-async def rate_limit_check(request: Request):
+async def get_admin_user(
+    current_user: User = Depends(get_current_user)
+) -> User:
     """
-    Dependency for API rate limiting
+    Dependency requiring a user with the is_admin flag
     
     Raises:
-        HTTPException: If rate limit exceeded
+        HTTPException: If the user is not an admin
     """
-    client_ip = get_client_ip(request)
-    allowed, retry_after = api_rate_limiter.is_allowed(client_ip)
-    
-    if not allowed:
+    if not current_user.is_admin:
         raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Rate limit exceeded. Retry after {retry_after} seconds",
-            headers={"Retry-After": str(retry_after)}
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
         )
+    return current_user
 
 
-async def public_rate_limit_check(request: Request):
+async def public_hub_quota(slug: str) -> AsyncIterator[bool]:
     """
-    Dependency for public endpoint rate limiting (more lenient)
+    Dependency holding a hub quota slot for a public page request
     
-    Raises:
-        HTTPException: If rate limit exceeded
+    Yields False if the hub is over quota; the route then answers without
+    touching the database.
     """
-    client_ip = get_client_ip(request)
-    allowed, retry_after = public_rate_limiter.is_allowed(client_ip)
+    async with hub_quotas.admit(slug.lower(), "public") as admitted:
+        yield admitted
+
+
+async def visit_quota(slug: str) -> AsyncIterator[bool]:
+    """Hub quota for visit tracking (see `public_hub_quota`)"""
+    async with hub_quotas.admit(slug.lower(), "track_visit") as admitted:
+        yield admitted
+
+
+async def click_quota(link_id: UUID) -> AsyncIterator[bool]:
+    """
+    Hub quota for click tracking
     
-    if not allowed:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Rate limit exceeded. Retry after {retry_after} seconds",
-            headers={"Retry-After": str(retry_after)}
-        )
+    The hub of a link is only known once the link has been looked up, so
+    a link's first click is always admitted.
+    """
+    async with hub_quotas.admit(hub_quotas.link_slug(str(link_id)), "track_click") as admitted:
+        yield admitted
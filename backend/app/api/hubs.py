@@ -1,9 +1,9 @@
 """
 Smart Link Hub - Hub API Routes
 """
-from typing import List
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
@@ -12,10 +12,15 @@ from app.models.user import User
 from app.models.hub import Hub
 from app.models.link import Link
 from app.models.analytics import HubVisit
-from app.schemas.hub import HubCreate, HubUpdate, HubResponse, HubListResponse
-from app.api.deps import get_current_user, rate_limit_check
+from app.schemas.hub import (
+    HubCreate, HubUpdate, HubResponse, HubListResponse, BulkQRCodeRequest,
+    BulkShortURLRequest, ShortURLMapping, BulkShortURLResponse, ShortURLUpdate
+)
+from app.services.hub_quotas import hub_quotas
+from app.services.short_url_map import short_url_map
+from app.api.deps import get_current_user
 
-router = APIRouter(prefix="/hubs", tags=["Hubs"], dependencies=[Depends(rate_limit_check)])
+router = APIRouter(prefix="/hubs", tags=["Hubs"])
 
 
 @router.get("", response_model=HubListResponse)
@@ -32,11 +37,23 @@ async def list_hubs(
     total = query.count()
     hubs = query.order_by(Hub.created_at.desc()).offset(skip).limit(limit).all()
     
-    # Add computed fields
+    # Add computed fields (one grouped query per table for the whole page)
+    hub_ids = [hub.id for hub in hubs]
+    link_counts = dict(
+        db.query(Link.hub_id, func.count(Link.id))
+        .filter(Link.hub_id.in_(hub_ids))
+        .group_by(Link.hub_id).all()
+    ) if hub_ids else {}
+    visit_counts = dict(
+        db.query(HubVisit.hub_id, func.count(HubVisit.id))
+        .filter(HubVisit.hub_id.in_(hub_ids))
+        .group_by(HubVisit.hub_id).all()
+    ) if hub_ids else {}
+    
     hub_responses = []
     for hub in hubs:
-        link_count = db.query(func.count(Link.id)).filter(Link.hub_id == hub.id).scalar() or 0
-        total_visits = db.query(func.count(HubVisit.id)).filter(HubVisit.hub_id == hub.id).scalar() or 0
+        link_count = link_counts.get(hub.id, 0)
+        total_visits = visit_counts.get(hub.id, 0)
         
         hub_response = HubResponse(
             id=hub.id,
@@ -172,6 +189,8 @@ async def update_hub(
             detail="Hub not found"
         )
     
+    old_slug = hub.slug
+    
     # Check slug uniqueness if being changed
     if hub_data.slug and hub_data.slug.lower() != hub.slug:
         existing = db.query(Hub).filter(Hub.slug == hub_data.slug.lower()).first()
@@ -194,6 +213,8 @@ async def update_hub(
     
     db.commit()
     db.refresh(hub)
+    short_url_map.update_hub(str(hub.id), hub.slug, hub.is_active)
+    hub_quotas.forget_hub(old_slug)
     
     link_count = db.query(func.count(Link.id)).filter(Link.hub_id == hub.id).scalar() or 0
     total_visits = db.query(func.count(HubVisit.id)).filter(HubVisit.hub_id == hub.id).scalar() or 0
@@ -232,16 +253,21 @@ async def delete_hub(
             detail="Hub not found"
         )
     
+    slug = hub.slug
     db.delete(hub)
     db.commit()
+    short_url_map.remove_hub(str(hub_id))
+    hub_quotas.forget_hub(slug)
 
 
 @router.get("/{hub_id}/qrcode")
 async def get_hub_qr_code(
     hub_id: UUID,
+    request: Request,
     size: int = Query(256, ge=128, le=512),
     fg_color: str = Query("#22C55E", description="Foreground color (hex)"),
     bg_color: str = Query("#000000", description="Background color (hex)"),
+    format: str = Query("png", pattern="^(png|svg)$"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -251,12 +277,13 @@ async def get_hub_qr_code(
     - **size**: QR code size in pixels (128-512)
     - **fg_color**: Foreground/module color (hex, e.g., #22C55E)
     - **bg_color**: Background color (hex, e.g., #000000)
+    - **format**: png or svg (vector)
     
-    Returns PNG image bytes.
+    Returns image bytes. Responses carry a strong ETag (revalidate with
+    If-None-Match); `Content-Location` points at the immutable cached copy.
     """
     from fastapi.responses import Response
-    from app.services.qr_service import generate_qr_code
-    from app.config import settings
+    from app.services.qr_cache import qr_cache, MEDIA_TYPES
     
     hub = db.query(Hub).filter(
         Hub.id == hub_id,
@@ -272,21 +299,37 @@ async def get_hub_qr_code(
     # Generate public URL using configurable frontend URL
     from app.config import settings
     public_url = f"{settings.FRONTEND_URL}/{hub.slug}"
+    slug = hub.slug
+    db.close()
+    
+    try:
+        digest, image_bytes = await qr_cache.get_or_render(
+            url=public_url,
+            size=size,
+            fg_color=fg_color,
+            bg_color=bg_color,
+            format=format
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    # Generate QR code
-    image_bytes = generate_qr_code(
-        url=public_url,
-        size=size,
-        fg_color=fg_color,
-        bg_color=bg_color
-    )
+    etag = f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Location": f"/api/qr/{digest}.{format}"
+    }
+    if etag in _parse_if_none_match(request.headers.get("if-none-match")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     
+    headers["Content-Disposition"] = f'attachment; filename="{slug}-qr.{format}"'
     return Response(
         content=image_bytes,
-        media_type="image/png",
-        headers={
-            "Content-Disposition": f'attachment; filename="{hub.slug}-qr.png"'
-        }
+        media_type=MEDIA_TYPES[format],
+        headers=headers
     )
 
 
@@ -300,8 +343,10 @@ async def get_hub_qr_code_base64(
     """
     Generate and return a QR code as base64 data URL.
     Useful for embedding in web pages without separate image requests.
+    `qr_url` is a cacheable URL for the same image.
     """
-    from app.services.qr_service import generate_qr_code_base64
+    import base64
+    from app.services.qr_cache import qr_cache
     
     hub = db.query(Hub).filter(
         Hub.id == hub_id,
@@ -316,13 +361,63 @@ async def get_hub_qr_code_base64(
     
     from app.config import settings
     public_url = f"{settings.FRONTEND_URL}/{hub.slug}"
+    db.close()
     
-    data_url = generate_qr_code_base64(
+    digest, image_bytes = await qr_cache.get_or_render(
         url=public_url,
-        size=size
+        size=size,
+        fg_color="#000000",
+        bg_color="#FFFFFF"
     )
+    data_url = f"data:image/png;base64,{base64.b64encode(image_bytes).decode('utf-8')}"
     
-    return {"qr_code": data_url, "url": public_url}
+    return {"qr_code": data_url, "url": public_url, "qr_url": f"/api/qr/{digest}.png"}
+
+
+@router.post("/qrcodes/bulk")
+async def bulk_qr_codes(
+    request_data: BulkQRCodeRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download QR codes for many hubs as a single ZIP archive.
+    
+    Codes are rendered in parallel across the QR worker processes and the
+    archive is streamed while rendering, one `{slug}.{format}` per hub.
+    """
+    from fastapi.responses import StreamingResponse
+    from app.services.qr_cache import qr_cache
+    from app.config import settings
+    
+    hubs = _owned_hubs(db, request_data.hub_ids, current_user.id)
+    db.close()
+    
+    entries = [
+        (f"{row.slug}.{request_data.format}", f"{settings.FRONTEND_URL}/{row.slug}")
+        for row in hubs
+    ]
+    
+    return StreamingResponse(
+        qr_cache.stream_zip(
+            entries,
+            size=request_data.size,
+            fg_color=request_data.fg_color,
+            bg_color=request_data.bg_color,
+            format=request_data.format
+        ),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="qrcodes.zip"'
+        }
+    )
+
+
+def _parse_if_none_match(value: Optional[str]) -> List[str]:
+    """Split an If-None-Match header into its entity tags"""
+    if not value:
+        return []
+    return [tag.strip().removeprefix("W/") for tag in value.split(",")]
 
 
 
@@ -358,7 +453,9 @@ async def create_short_url(
         "short_url": f"/s/{short_url.short_code}",
         "full_short_url": f"{settings.APP_BASE_URL}/s/{short_url.short_code}",
         "hub_slug": hub.slug,
-        "click_count": short_url.click_count
+        "click_count": short_url.click_count,
+        "redirect_status": short_url.redirect_status,
+        "cache_max_age": short_url.cache_max_age
     }
 
 
@@ -399,5 +496,148 @@ async def get_short_url(
         "full_short_url": f"{settings.APP_BASE_URL}/s/{short_url.short_code}",
         "hub_slug": hub.slug,
         "click_count": short_url.click_count,
-        "is_active": short_url.is_active
+        "is_active": short_url.is_active,
+        "redirect_status": short_url.redirect_status,
+        "cache_max_age": short_url.cache_max_age
     }
+
+
+@router.patch("/{hub_id}/shorten")
+async def update_short_url(
+    hub_id: UUID,
+    update_data: ShortURLUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Enable/disable a hub's short URL or change its redirect policy.
+    
+    - **redirect_status**: 301/308 (cacheable) or 302/307 (never cached)
+    - **cache_max_age**: Cache lifetime of 301/308 redirects in seconds
+    
+    Cached redirects keep working in browsers until they expire, so
+    disabling a cacheable short URL takes effect within its max-age.
+    """
+    from app.services.url_shortener import get_short_url_by_hub, update_short_url as update_short
+    
+    hub = db.query(Hub).filter(
+        Hub.id == hub_id,
+        Hub.user_id == current_user.id
+    ).first()
+    
+    if not hub:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hub not found"
+        )
+    
+    short_url = get_short_url_by_hub(db, str(hub_id))
+    
+    if not short_url:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No short URL exists for this hub. Create one first with POST."
+        )
+    
+    short_url = update_short(db, short_url, update_data.model_dump(exclude_unset=True))
+    
+    from app.config import settings
+    return {
+        "short_code": short_url.short_code,
+        "short_url": f"/s/{short_url.short_code}",
+        "full_short_url": f"{settings.APP_BASE_URL}/s/{short_url.short_code}",
+        "hub_slug": hub.slug,
+        "click_count": short_url.click_count,
+        "is_active": short_url.is_active,
+        "redirect_status": short_url.redirect_status,
+        "cache_max_age": short_url.cache_max_age
+    }
+
+
+@router.post("/shorten/bulk", response_model=BulkShortURLResponse)
+async def bulk_create_short_urls(
+    request_data: BulkShortURLRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create short URLs for many hubs in one request.
+    
+    Hubs that already have a short URL keep it. All new codes are allocated
+    and inserted in a single transaction; hubs whose code collided are
+    retried, and any that still have no short URL are listed in `missing`.
+    """
+    from app.services.url_shortener import bulk_create_short_urls as bulk_create
+    
+    hubs = _owned_hubs(db, request_data.hub_ids, current_user.id)
+    mappings = bulk_create(db, hubs)
+    
+    short_urls = _short_url_mappings(hubs, mappings)
+    return BulkShortURLResponse(
+        short_urls=short_urls,
+        created=sum(1 for item in short_urls if item.created),
+        missing=[hub.id for hub in hubs if str(hub.id) not in mappings]
+    )
+
+
+@router.post("/shorten/lookup", response_model=BulkShortURLResponse)
+async def lookup_short_urls(
+    request_data: BulkShortURLRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the existing short URLs of many hubs.
+    
+    Hubs without a short URL are listed in `missing`.
+    """
+    from app.services.url_shortener import get_short_urls_by_hubs
+    
+    hubs = _owned_hubs(db, request_data.hub_ids, current_user.id)
+    mappings = get_short_urls_by_hubs(db, [hub.id for hub in hubs])
+    
+    return BulkShortURLResponse(
+        short_urls=_short_url_mappings(hubs, mappings),
+        missing=[hub.id for hub in hubs if str(hub.id) not in mappings]
+    )
+
+
+def _owned_hubs(db: Session, hub_ids: List[UUID], user_id: UUID) -> list:
+    """Load (id, slug, is_active) of hubs owned by the user; 404 if any is missing"""
+    hub_ids = list(dict.fromkeys(hub_ids))
+    hubs = db.query(Hub.id, Hub.slug, Hub.is_active).filter(
+        Hub.id.in_(hub_ids),
+        Hub.user_id == user_id
+    ).all()
+    
+    if len(hubs) != len(hub_ids):
+        found = {row.id for row in hubs}
+        missing = [str(hub_id) for hub_id in hub_ids if hub_id not in found]
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Hubs not found: {', '.join(missing[:10])}"
+        )
+    return hubs
+
+
+def _short_url_mappings(hubs: list, mappings: dict) -> List[ShortURLMapping]:
+    """Combine hub rows with their short URL data"""
+    from app.config import settings
+    
+    result = []
+    for hub in hubs:
+        mapping = mappings.get(str(hub.id))
+        if mapping is None:
+            continue
+        code = mapping["short_code"]
+        result.append(ShortURLMapping(
+            hub_id=hub.id,
+            hub_slug=hub.slug,
+            short_code=code,
+            short_url=f"/s/{code}",
+            full_short_url=f"{settings.APP_BASE_URL}/s/{code}",
+            click_count=mapping["click_count"] or 0,
+            is_active=mapping["is_active"],
+            created=mapping["created"]
+        ))
+    return result
@@ -12,9 +12,12 @@ from app.models.user import User
 from app.models.hub import Hub
 from app.models.link import Link
 from app.schemas.link import LinkCreate, LinkUpdate, LinkResponse, LinkListResponse, LinkReorderRequest
-from app.api.deps import get_current_user, rate_limit_check
+from app.schemas.hub import ShortURLUpdate
+from app.services.hub_quotas import hub_quotas
+from app.services.short_url_map import short_url_map
+from app.api.deps import get_current_user
 
-router = APIRouter(tags=["Links"], dependencies=[Depends(rate_limit_check)])
+router = APIRouter(tags=["Links"])
 
 
 def verify_hub_ownership(hub_id: UUID, user_id: UUID, db: Session) -> Hub:
@@ -76,7 +79,7 @@ async def create_link(
     - **icon**: Optional emoji or icon identifier
     - **position**: Optional position (auto-assigned if not provided)
     """
-    verify_hub_ownership(hub_id, current_user.id, db)
+    hub = verify_hub_ownership(hub_id, current_user.id, db)
     
     # Get next position if not specified
     if link_data.position is None:
@@ -96,6 +99,7 @@ async def create_link(
     db.add(link)
     db.commit()
     db.refresh(link)
+    hub_quotas.forget_hub(hub.slug)
     
     return LinkResponse.model_validate(link)
 
@@ -126,6 +130,8 @@ async def update_link(
     
     db.commit()
     db.refresh(link)
+    short_url_map.update_link(str(link.id), str(link.hub_id), link.url, link.is_enabled)
+    hub_quotas.forget_hub(link.hub.slug)
     
     return LinkResponse.model_validate(link)
 
@@ -140,8 +146,12 @@ async def delete_link(
     Delete a link
     """
     link = verify_link_ownership(link_id, current_user.id, db)
+    hub_id = str(link.hub_id)
+    slug = link.hub.slug
     db.delete(link)
     db.commit()
+    short_url_map.remove_link(str(link_id), hub_id)
+    hub_quotas.forget_hub(slug)
 
 
 @router.put("/hubs/{hub_id}/links/reorder")
@@ -154,7 +164,7 @@ async def reorder_links(
     """
     Reorder links by providing ordered list of link IDs
     """
-    verify_hub_ownership(hub_id, current_user.id, db)
+    hub = verify_hub_ownership(hub_id, current_user.id, db)
     
     # Update positions based on order in the list
     for position, link_id in enumerate(reorder_data.link_ids):
@@ -163,5 +173,93 @@ async def reorder_links(
             link.position = position
     
     db.commit()
+    hub_quotas.forget_hub(hub.slug)
     
     return {"message": "Links reordered successfully"}
+
+
+@router.post("/links/{link_id}/shorten")
+async def create_link_short_url(
+    link_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create a short URL for a single link.
+    
+    /s/{short_code} redirects straight to the link's URL (no hub page in
+    between) and records the click against the link.
+    """
+    from app.services.url_shortener import create_link_short_url as create_short
+    
+    link = verify_link_ownership(link_id, current_user.id, db)
+    short_url = create_short(db, link)
+    
+    return _link_short_url_response(short_url, link)
+
+
+@router.get("/links/{link_id}/shorten")
+async def get_link_short_url(
+    link_id: UUID,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the existing short URL for a link.
+    """
+    from app.services.url_shortener import get_short_url_by_link
+    
+    link = verify_link_ownership(link_id, current_user.id, db)
+    short_url = get_short_url_by_link(db, str(link_id))
+    
+    if not short_url:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No short URL exists for this link. Create one first with POST."
+        )
+    
+    return _link_short_url_response(short_url, link)
+
+
+@router.patch("/links/{link_id}/shorten")
+async def update_link_short_url(
+    link_id: UUID,
+    update_data: ShortURLUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Enable/disable a link's short URL or change its redirect policy.
+    
+    See `PATCH /hubs/{hub_id}/shorten`.
+    """
+    from app.services.url_shortener import get_short_url_by_link, update_short_url
+    
+    link = verify_link_ownership(link_id, current_user.id, db)
+    short_url = get_short_url_by_link(db, str(link_id))
+    
+    if not short_url:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No short URL exists for this link. Create one first with POST."
+        )
+    
+    short_url = update_short_url(db, short_url, update_data.model_dump(exclude_unset=True))
+    return _link_short_url_response(short_url, link)
+
+
+def _link_short_url_response(short_url, link: Link) -> dict:
+    """Response body for a link short URL"""
+    from app.config import settings
+    
+    return {
+        "short_code": short_url.short_code,
+        "short_url": f"/s/{short_url.short_code}",
+        "full_short_url": f"{settings.APP_BASE_URL}/s/{short_url.short_code}",
+        "link_id": str(link.id),
+        "target_url": link.url,
+        "click_count": short_url.click_count,
+        "is_active": short_url.is_active,
+        "redirect_status": short_url.redirect_status,
+        "cache_max_age": short_url.cache_max_age
+    }
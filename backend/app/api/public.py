@@ -2,28 +2,39 @@
 Smart Link Hub - Public Hub API Routes
 Public page rendering with rule engine processing
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 
-from app.database import get_db
+from app.database import get_public_db
 from app.models.hub import Hub
 from app.models.rule import Rule
 from app.models.analytics import HubVisit
 from app.schemas.hub import HubPublicResponse, ProcessedLinkResponse
 from app.services.rule_engine import process_hub_links
 from app.services.geo_service import geo_service
+from app.services.hub_quotas import hub_quotas
 from app.utils.device_detector import get_device_type
-from app.api.deps import get_client_ip, public_rate_limit_check
+from app.api.deps import get_client_ip, public_hub_quota
 
-router = APIRouter(prefix="/public", tags=["Public"], dependencies=[Depends(public_rate_limit_check)])
+router = APIRouter(prefix="/public", tags=["Public"])
+
+
+def _over_quota() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Hub is receiving too much traffic, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
 
 
 @router.get("/{slug}", response_model=HubPublicResponse)
 async def get_public_hub(
     slug: str,
     request: Request,
-    db: Session = Depends(get_db)
+    response: Response,
+    admitted: bool = Depends(public_hub_quota),
+    db: Session = Depends(get_public_db)
 ):
     """
     Get public hub page with smart link processing
@@ -38,10 +49,32 @@ async def get_public_hub(
     - Device type (mobile/tablet/desktop)
     - Geographic location (country)
     - Link performance (CTR ranking)
+    
+    If the hub is over its quota, the last page rendered for the same
+    device type and country is returned (marked with X-Hub-Snapshot), or
+    503 if there is none. Shed requests never wait on the geo API: visitors
+    whose country isn't cached get the default country's page.
     """
+    slug = slug.lower()
+    
+    # Get visitor context
+    client_ip = get_client_ip(request)
+    user_agent = request.headers.get("User-Agent", "")
+    device_type = get_device_type(user_agent)
+    
+    if not admitted:
+        country = geo_service.get_cached_country(client_ip) or "US"
+        page = hub_quotas.snapshot(slug, device_type, country)
+        if page is None:
+            raise _over_quota()
+        response.headers["X-Hub-Snapshot"] = "1"
+        return page
+    
+    country = geo_service.get_country_safe(client_ip, default="US")
+    
     # Find hub by slug
     hub = db.query(Hub).filter(
-        Hub.slug == slug.lower(),
+        Hub.slug == slug,
         Hub.is_active.is_(True)
     ).first()
     
@@ -51,12 +84,6 @@ async def get_public_hub(
             detail="Hub not found"
         )
     
-    # Get visitor context
-    client_ip = get_client_ip(request)
-    user_agent = request.headers.get("User-Agent", "")
-    device_type = get_device_type(user_agent)
-    country = geo_service.get_country_safe(client_ip, default="US")
-    
     # Get total visits for performance-based rules
     total_visits = db.query(func.count(HubVisit.id)).filter(
         HubVisit.hub_id == hub.id
@@ -89,12 +116,15 @@ async def get_public_hub(
         for link in processed_links
     ]
     
-    return HubPublicResponse(
+    page = HubPublicResponse(
         title=hub.title,
         description=hub.description,
         theme=hub.theme or {"background": "#000000", "accent": "#22C55E"},
         links=link_responses
     )
+    db.close()  # Return the connection before the response is serialized
+    hub_quotas.store_snapshot(slug, device_type, country, page)
+    return page
 
 
 @router.get("/{slug}/preview")
@@ -102,7 +132,8 @@ async def preview_hub(
     slug: str,
     device: str = "desktop",
     country: str = "US",
-    db: Session = Depends(get_db)
+    admitted: bool = Depends(public_hub_quota),
+    db: Session = Depends(get_public_db)
 ):
     """
     Preview hub with custom device/country for testing rules
@@ -110,6 +141,9 @@ async def preview_hub(
     This endpoint allows testing how links will appear for different visitors.
     Useful for verifying rule configuration.
     """
+    if not admitted:
+        raise _over_quota()
+    
     hub = db.query(Hub).filter(
         Hub.slug == slug.lower(),
         Hub.is_active == True
@@ -141,7 +175,7 @@ async def preview_hub(
         total_visits=total_visits
     )
     
-    return {
+    preview = {
         "hub": {
             "title": hub.title,
             "description": hub.description,
@@ -164,3 +198,5 @@ async def preview_hub(
         ],
         "rules_applied": len(rules)
     }
+    db.close()
+    return preview
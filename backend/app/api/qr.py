@@ -0,0 +1,39 @@
+"""
+Smart Link Hub - QR Code Routes
+Content-addressed QR code images
+"""
+from fastapi import APIRouter, HTTPException, status, Path
+from fastapi.responses import Response
+
+from app.services.qr_cache import qr_cache, MEDIA_TYPES
+
+router = APIRouter(prefix="/qr", tags=["QR Codes"])
+
+
+@router.get("/{digest}.{format}")
+async def get_cached_qr_code(
+    digest: str = Path(..., pattern="^[0-9a-f]{64}$"),
+    format: str = Path(..., pattern="^(png|svg)$")
+):
+    """
+    Serve a previously rendered QR code by its content digest.
+    
+    The digest covers every rendering input, so the bytes behind a URL never
+    change and the response may be cached forever by browsers and CDNs.
+    Digests are returned by the hub QR code endpoints.
+    """
+    content = await qr_cache.get(digest, format)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="QR code not found"
+        )
+    
+    return Response(
+        content=content,
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "ETag": f'"{digest}"',
+            "Cache-Control": "public, max-age=31536000, immutable"
+        }
+    )
@@ -2,51 +2,100 @@
 Smart Link Hub - Redirect API Routes
 Handles short URL redirects
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
 
-from app.database import get_db
 from app.config import settings
-from app.services.url_shortener import get_short_url_by_code, increment_click_count
+from app.services.short_url_map import short_url_map
+from app.services.click_buffer import click_buffer
+from app.services.hub_quotas import hub_quotas
+from app.services.live_service import live_analytics
+from app.api.deps import get_client_ip
+from app.utils.metrics import metrics
 
 router = APIRouter(tags=["Redirect"])
 
+# Browsers and CDNs may cache these until max-age expires
+CACHEABLE_STATUSES = (301, 308)
+NO_STORE = {"Cache-Control": "no-store"}
+
+metrics.counter("short_url_redirects_total", "Short URL redirects served")
+metrics.counter("short_url_not_found_total", "Short URL requests answered with 404")
+
+
+def _not_found(detail: str) -> HTTPException:
+    metrics.inc("short_url_not_found_total")
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=detail,
+        headers=NO_STORE
+    )
+
 
 @router.get("/s/{short_code}")
-async def redirect_short_url(
-    short_code: str,
-    db: Session = Depends(get_db)
-):
+async def redirect_short_url(short_code: str, request: Request):
     """
-    Redirect short URL to the original hub URL.
+    Redirect short URL to the original hub URL, or straight to the link's
+    URL for link short URLs.
+    
+    Fast redirect with click tracking. Served from the in-memory short URL
+    map; clicks are counted in memory and written to the database in batches.
+    
+    301/308 redirects are sent with a public max-age (capped by
+    SHORT_URL_MAX_CACHE_SECONDS) so repeat visits skip the server; clicks
+    served from a browser cache are not counted. 302/307 redirects and 404s
+    are never cached.
     
-    Fast redirect with click tracking.
+    Redirects are never shed, as they don't touch the database; link click
+    analytics are dropped while the hub is over its rate quota.
     """
-    short_url = get_short_url_by_code(db, short_code)
+    target = await short_url_map.resolve(short_code)
     
-    if not short_url:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Short URL not found"
-        )
+    if not target or not target.is_active:
+        raise _not_found("Short URL not found")
     
     # Increment click count
-    increment_click_count(db, short_url)
-    
-    # Get the hub slug
-    hub = short_url.hub
-    if not hub or not hub.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Hub not found or inactive"
-        )
+    short_url_map.record_click(short_code)
     
-    # Redirect to the public hub page using configurable frontend URL
-    redirect_url = f"{settings.FRONTEND_URL}/{hub.slug}"
+    if not target.hub_active:
+        raise _not_found("Hub not found or inactive")
     
+    if target.link_id:
+        if not target.link_enabled:
+            raise _not_found("Link not found or disabled")
+        
+        # One hop: record the link click and go straight to the destination
+        if await hub_quotas.allow(target.slug, "redirect"):
+            click_buffer.add(
+                target.link_id,
+                target.hub_id,
+                get_client_ip(request),
+                request.headers.get("User-Agent", "")
+            )
+            live_analytics.record(target.hub_id, "click", link_id=target.link_id)
+        redirect_url = target.url
+    else:
+        # Redirect to the public hub page using configurable frontend URL
+        redirect_url = f"{settings.FRONTEND_URL}/{target.slug}"
+    
+    cacheable = target.redirect_status in CACHEABLE_STATUSES
+    if cacheable:
+        max_age = min(
+            target.cache_max_age if target.cache_max_age is not None
+            else settings.SHORT_URL_DEFAULT_CACHE_SECONDS,
+            settings.SHORT_URL_MAX_CACHE_SECONDS
+        )
+        headers = {"Cache-Control": f"public, max-age={max_age}"}
+    else:
+        headers = NO_STORE
+    
+    metrics.inc(
+        "short_url_redirects_total",
+        status=str(target.redirect_status),
+        cacheable="true" if cacheable else "false"
+    )
     return RedirectResponse(
         url=redirect_url,
-        status_code=status.HTTP_307_TEMPORARY_REDIRECT
+        status_code=target.redirect_status,
+        headers=headers
     )
-
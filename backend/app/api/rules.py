@@ -11,9 +11,10 @@ from app.models.user import User
 from app.models.hub import Hub
 from app.models.rule import Rule
 from app.schemas.rule import RuleCreate, RuleUpdate, RuleResponse, RuleListResponse, RulePresets
-from app.api.deps import get_current_user, rate_limit_check
+from app.services.hub_quotas import hub_quotas
+from app.api.deps import get_current_user
 
-router = APIRouter(tags=["Rules"], dependencies=[Depends(rate_limit_check)])
+router = APIRouter(tags=["Rules"])
 
 
 def verify_hub_ownership(hub_id: UUID, user_id: UUID, db: Session) -> Hub:
@@ -83,7 +84,7 @@ async def create_rule(
     - **hide**: Hide the link
     - **set_priority**: Set absolute priority value
     """
-    verify_hub_ownership(hub_id, current_user.id, db)
+    hub = verify_hub_ownership(hub_id, current_user.id, db)
     
     # Validate rule type
     valid_types = ["time", "device", "location", "performance"]
@@ -106,6 +107,7 @@ async def create_rule(
     db.add(rule)
     db.commit()
     db.refresh(rule)
+    hub_quotas.forget_hub(hub.slug)
     
     return RuleResponse.model_validate(rule)
 
@@ -140,6 +142,7 @@ async def update_rule(
     
     db.commit()
     db.refresh(rule)
+    hub_quotas.forget_hub(rule.hub.slug)
     
     return RuleResponse.model_validate(rule)
 
@@ -154,8 +157,10 @@ async def delete_rule(
     Delete a rule
     """
     rule = verify_rule_ownership(rule_id, current_user.id, db)
+    slug = rule.hub.slug
     db.delete(rule)
     db.commit()
+    hub_quotas.forget_hub(slug)
 
 
 @router.get("/rules/presets")
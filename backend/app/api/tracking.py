@@ -6,29 +6,39 @@ from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_ingest_db
 from app.models.hub import Hub
 from app.models.link import Link
 from app.services.analytics_service import AnalyticsService
 from app.services.geo_service import geo_service
+from app.services.hub_quotas import hub_quotas
+from app.services.live_service import live_analytics
 from app.utils.device_detector import get_device_type
-from app.api.deps import get_client_ip, public_rate_limit_check
+from app.api.deps import get_client_ip, visit_quota, click_quota
 
-router = APIRouter(prefix="/track", tags=["Tracking"], dependencies=[Depends(public_rate_limit_check)])
+router = APIRouter(prefix="/track", tags=["Tracking"])
+
+# Answer for events dropped because their hub is over quota
+OVER_QUOTA = {"recorded": False, "message": "Hub over quota"}
 
 
 @router.post("/visit/{slug}")
 async def track_visit(
     slug: str,
     request: Request,
-    db: Session = Depends(get_db)
+    admitted: bool = Depends(visit_quota),
+    db: Session = Depends(get_ingest_db)
 ):
     """
     Track a hub page visit
     
     Should be called when the public hub page loads.
-    Includes bot protection and rate limiting.
+    Includes bot protection and rate limiting. Visits to a hub over its
+    quota are dropped.
     """
+    if not admitted:
+        return OVER_QUOTA
+    
     hub = db.query(Hub).filter(Hub.slug == slug.lower()).first()
     if not hub:
         raise HTTPException(
@@ -44,13 +54,15 @@ async def track_visit(
     
     # Track visit
     analytics = AnalyticsService(db)
-    recorded, message = analytics.track_visit(
+    recorded, message = await analytics.track_visit(
         hub_id=str(hub.id),
         visitor_ip=client_ip,
         user_agent=user_agent,
         device_type=device_type,
         country=country
     )
+    if recorded:
+        live_analytics.record(str(hub.id), "visit", device_type, country)
     
     return {
         "recorded": recorded,
@@ -62,20 +74,27 @@ async def track_visit(
 async def track_click(
     link_id: UUID,
     request: Request,
-    db: Session = Depends(get_db)
+    admitted: bool = Depends(click_quota),
+    db: Session = Depends(get_ingest_db)
 ):
     """
     Track a link click
     
     Should be called when a user clicks on a link.
     Updates the link's click count and records detailed analytics.
+    Clicks on a hub over its quota are dropped.
     """
+    if not admitted:
+        return OVER_QUOTA
+    
     link = db.query(Link).filter(Link.id == link_id).first()
     if not link:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Link not found"
         )
+    if hub_quotas.link_slug(str(link.id)) is None:
+        hub_quotas.remember_link(str(link.id), link.hub.slug)
     
     # Extract visitor info
     client_ip = get_client_ip(request)
@@ -93,6 +112,8 @@ async def track_click(
         device_type=device_type,
         country=country
     )
+    if recorded:
+        live_analytics.record(str(link.hub_id), "click", device_type, country, str(link.id))
     
     return {
         "recorded": recorded,
@@ -0,0 +1,58 @@
+"""
+Smart Link Hub - Command Line Tools
+
+Usage:
+    python -m app.cli export-events --table visits --start 2026-01-01 --end 2026-01-31 \
+        --format parquet --output visits.parquet [--hub-id <uuid>]
+"""
+import argparse
+import sys
+from datetime import datetime, time, timedelta
+
+from app.services.export_service import stream_events_columnar
+
+
+def _parse_date(value: str):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def export_events(args: argparse.Namespace) -> int:
+    """Write raw events for a date range to a Parquet/Arrow file"""
+    start = datetime.combine(args.start, time.min)
+    end = datetime.combine(args.end + timedelta(days=1), time.min)
+    
+    written = 0
+    with open(args.output, "wb") as f:
+        for chunk in stream_events_columnar(
+            args.table, start, end,
+            hub_id=args.hub_id,
+            file_format=args.format,
+            row_group_size=args.row_group_size
+        ):
+            f.write(chunk)
+            written += len(chunk)
+    
+    print(f"Wrote {written} bytes to {args.output}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Smart Link Hub tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    export = commands.add_parser("export-events", help="Export hub_visits/link_clicks as Parquet or Arrow")
+    export.add_argument("--table", choices=["visits", "clicks"], required=True)
+    export.add_argument("--start", type=_parse_date, required=True, help="First day (YYYY-MM-DD, UTC)")
+    export.add_argument("--end", type=_parse_date, required=True, help="Last day, inclusive (YYYY-MM-DD, UTC)")
+    export.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    export.add_argument("--hub-id", default=None, help="Only export one hub (default: all hubs)")
+    export.add_argument("--row-group-size", type=int, default=50000)
+    export.add_argument("--output", required=True)
+    export.set_defaults(handler=export_events)
+    
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
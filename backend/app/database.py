@@ -1,29 +1,221 @@
 """
 Smart Link Hub - Database Configuration
+
+Traffic classes get separate connection pools so one can't starve the
+others: slow analytics queries can't hold the connections public pages
+need, and a click flood can't lock dashboard users out.
+
+- default: dashboard CRUD, auth and background jobs
+- public-read: public hub pages and short URL lookups
+- ingest-write: visit/click tracking and batched click writes
+- analytics-read: analytics, exports and reports (optionally a read replica)
+
+Route dependencies hand out a `LazySession`, which only creates its
+Session when first used; per-pool utilization is exported as metrics.
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.query_tracker import instrument_engine
+from app.utils.slow_query_log import slow_query_log
+
+
+def _create_engine(
+    name: str,
+    url: str,
+    pool_size: int,
+    max_overflow: int,
+    statement_timeout_ms: int = 0,
+    pool_timeout: Optional[float] = None
+) -> Engine:
+    """Create one pool; PostgreSQL connections are tagged with the pool name"""
+    connect_args = {}
+    if url.startswith("postgresql"):
+        connect_args["application_name"] = f"smart-link-hub:{name}"
+        if statement_timeout_ms:
+            connect_args["options"] = f"-c statement_timeout={statement_timeout_ms}"
+
+    pool_args = {"pool_timeout": pool_timeout} if pool_timeout is not None else {}
+    return create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        connect_args=connect_args,
+        **pool_args
+    )
+
+
+# Create database engines
+engine = _create_engine(
+    "default",
+    settings.DATABASE_URL,
+    settings.DB_POOL_SIZE,
+    settings.DB_MAX_OVERFLOW,
+    settings.DB_STATEMENT_TIMEOUT_MS
+)
+
+public_engine = _create_engine(
+    "public-read",
+    settings.DATABASE_URL,
+    settings.PUBLIC_DB_POOL_SIZE,
+    settings.PUBLIC_DB_MAX_OVERFLOW,
+    settings.PUBLIC_DB_STATEMENT_TIMEOUT_MS,
+    settings.PUBLIC_DB_POOL_TIMEOUT_SECONDS
+)
 
-# Create database engine
-engine = create_engine(
+ingest_engine = _create_engine(
+    "ingest-write",
     settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    settings.INGEST_DB_POOL_SIZE,
+    settings.INGEST_DB_MAX_OVERFLOW,
+    settings.INGEST_DB_STATEMENT_TIMEOUT_MS
+)
+
+analytics_engine = _create_engine(
+    "analytics-read",
+    settings.ANALYTICS_DATABASE_URL or settings.DATABASE_URL,
+    settings.ANALYTICS_DB_POOL_SIZE,
+    settings.ANALYTICS_DB_MAX_OVERFLOW,
+    settings.ANALYTICS_DB_STATEMENT_TIMEOUT_MS
 )
 
-# Create session factory
+engines: Dict[str, Engine] = {
+    "default": engine,
+    "public-read": public_engine,
+    "ingest-write": ingest_engine,
+    "analytics-read": analytics_engine,
+}
+
+
+def _pool_samples(read):
+    return [({"pool": name}, read(pooled.pool)) for name, pooled in engines.items()]
+
+
+metrics.gauge(
+    "db_pool_size", "Configured persistent connections per pool",
+    lambda: _pool_samples(lambda pool: pool.size())
+)
+metrics.gauge(
+    "db_pool_checked_out", "Connections currently checked out",
+    lambda: _pool_samples(lambda pool: pool.checkedout())
+)
+metrics.gauge(
+    "db_pool_idle", "Idle connections held by the pool",
+    lambda: _pool_samples(lambda pool: pool.checkedin())
+)
+metrics.counter("db_pool_checkouts_total", "Connection checkouts")
+metrics.counter(
+    "db_pool_checkout_seconds_total",
+    "Time connections spent checked out; its rate over the pool size is the utilization"
+)
+metrics.counter("db_sessions_total", "Request sessions by whether they were used")
+
+
+def _instrument(name: str, pooled: Engine) -> None:
+    """Count checkouts and how long each connection is held"""
+
+    @event.listens_for(pooled.pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        metrics.inc("db_pool_checkouts_total", pool=name)
+
+    @event.listens_for(pooled.pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            metrics.inc(
+                "db_pool_checkout_seconds_total",
+                time.perf_counter() - checked_out_at,
+                pool=name
+            )
+
+
+for _name, _engine in engines.items():
+    _instrument(_name, _engine)
+    instrument_engine(_engine)
+    slow_query_log.instrument(_engine, _name)
+
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+PublicSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=public_engine)
+IngestSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=ingest_engine)
+AnalyticsSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=analytics_engine)
 
 # Create base class for models
 Base = declarative_base()
 
 
-def get_db():
-    """Dependency to get database session"""
-    db = SessionLocal()
+class LazySession:
+    """
+    Request session that is only created when first used
+
+    Attribute access is forwarded to a Session created on demand, so
+    requests that never reach the database (answered from a cache or
+    rejected early) skip creating one. A Session already checks out a
+    connection only when its first query runs and returns it on commit;
+    routes that only read should call `close()` once they are done with
+    the database to return it before serializing the response rather
+    than after. The proxy stays usable after `close()`.
+    """
+
+    __slots__ = ("_factory", "_pool", "_session")
+
+    def __init__(self, factory: sessionmaker, pool: str):
+        self._factory = factory
+        self._pool = pool
+        self._session: Optional[Session] = None
+
+    @property
+    def session(self) -> Session:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name: str):
+        return getattr(self.session, name)
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+
+    def finish(self) -> None:
+        """Close at the end of the request and count whether it was used"""
+        metrics.inc(
+            "db_sessions_total", pool=self._pool,
+            used="true" if self._session is not None else "false"
+        )
+        self.close()
+
+
+def _session(factory: sessionmaker, pool: str):
+    db = LazySession(factory, pool)
     try:
         yield db
     finally:
-        db.close()
+        db.finish()
+
+
+def get_db():
+    """Dependency to get database session"""
+    yield from _session(SessionLocal, "default")
+
+
+def get_public_db():
+    """Dependency to get a session from the public-read pool"""
+    yield from _session(PublicSessionLocal, "public-read")
+
+
+def get_ingest_db():
+    """Dependency to get a session from the ingest-write pool"""
+    yield from _session(IngestSessionLocal, "ingest-write")
+
+
+def get_analytics_db():
+    """Dependency to get a session from the analytics-read pool"""
+    yield from _session(AnalyticsSessionLocal, "analytics-read")
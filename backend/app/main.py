@@ -2,6 +2,7 @@
 Smart Link Hub - FastAPI Application Entry Point
 """
 
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,6 +11,8 @@ from sqlalchemy import text
 
 from app.config import settings
 from app.database import engine, Base, SessionLocal
+from app.utils.background import start_periodic, stop_periodic
+from app.utils.executors import shutdown_executors
 
 # --------------------------------------------------
 # Logging Configuration
@@ -34,8 +37,62 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"Could not create database tables at startup: {e}")
         logger.warning("Database will be initialized by alembic migrations")
+    
+    from app.services.short_url_map import short_url_map
+    from app.services.click_buffer import click_buffer
+    from app.utils.notifications import notification_listener
+    from app.services.hub_quotas import hub_quotas
+    short_url_map.listen()
+    hub_quotas.listen()
+    await asyncio.to_thread(notification_listener.start)  # Before loading, so no change is missed
+    try:
+        await asyncio.to_thread(short_url_map.load)
+        logger.info(f"Short URL map loaded ({len(short_url_map)} codes)")
+    except Exception as e:
+        logger.warning(f"Could not load short URL map at startup: {e}")
+    
+    # Background jobs
+    from app.services.analytics_service import refresh_analytics_rollups
+    from app.services.report_jobs import report_jobs
+    from app.utils.rate_limiter import cleanup_rate_limiters
+    background_tasks = []
+    start_periodic(
+        background_tasks, "analytics-rollups",
+        settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS, refresh_analytics_rollups
+    )
+    start_periodic(background_tasks, "export-cleanup", 3600, report_jobs.cleanup_artifacts)
+    start_periodic(
+        background_tasks, "rate-limit-cleanup",
+        settings.RATE_LIMIT_CLEANUP_SECONDS, cleanup_rate_limiters
+    )
+    start_periodic(
+        background_tasks, "hub-quota-cleanup",
+        settings.RATE_LIMIT_CLEANUP_SECONDS, hub_quotas.cleanup
+    )
+    start_periodic(
+        background_tasks, "short-url-map",
+        settings.SHORT_URL_MAP_REFRESH_SECONDS, short_url_map.load
+    )
+    start_periodic(
+        background_tasks, "short-url-clicks",
+        settings.SHORT_URL_CLICK_FLUSH_SECONDS, short_url_map.flush_clicks
+    )
+    start_periodic(
+        background_tasks, "link-clicks",
+        settings.SHORT_URL_CLICK_FLUSH_SECONDS, click_buffer.flush
+    )
     yield
     # Shutdown
+    from app.services.live_service import live_analytics
+    live_analytics.shutdown()
+    await stop_periodic(background_tasks)
+    await asyncio.to_thread(notification_listener.stop)
+    for flush in (short_url_map.flush_clicks, click_buffer.flush):
+        try:
+            await asyncio.to_thread(flush)
+        except Exception as e:
+            logger.warning(f"Could not flush clicks: {e}")
+    shutdown_executors()
     logger.info("Application shutting down")
 
 
@@ -69,6 +126,36 @@ Use JWT Bearer token authentication. Get tokens via `/api/auth/login`.
     lifespan=lifespan
 )
 
+# --------------------------------------------------
+# Query Tracking
+# --------------------------------------------------
+# Counts queries and DB time per request and warns about repeated
+# statements (N+1); debug mode adds X-DB-Query-Count / X-DB-Time-Ms.
+# Also tells the slow query log which route ran a statement.
+from app.utils.query_tracker import QueryTrackingMiddleware
+
+if settings.DEBUG or settings.QUERY_REPEAT_WARN_THRESHOLD or settings.SLOW_QUERY_MS:
+    app.add_middleware(QueryTrackingMiddleware, headers=settings.DEBUG)
+
+# --------------------------------------------------
+# Rate Limiting
+# --------------------------------------------------
+# Applied before routing and DB session checkout. Added before CORS so
+# that CORS stays outermost and 429 responses carry CORS headers.
+from app.utils.rate_limit_middleware import RateLimitMiddleware
+from app.utils.rate_limiter import api_rate_limiter, public_rate_limiter
+
+app.add_middleware(
+    RateLimitMiddleware,
+    policies={
+        "/api": api_rate_limiter,
+        "/api/public": public_rate_limiter,
+        "/api/track": public_rate_limiter,
+        "/api/qr": public_rate_limiter,
+        "/s": public_rate_limiter,
+    }
+)
+
 # --------------------------------------------------
 # ✅ CORS CONFIGURATION (FIXED)
 # --------------------------------------------------
@@ -118,6 +205,19 @@ async def health_check():
     }
 
 
+# --------------------------------------------------
+# Metrics
+# --------------------------------------------------
+if settings.METRICS_ENABLED:
+    from fastapi.responses import PlainTextResponse
+    from app.utils.metrics import metrics
+
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """Prometheus metrics of this worker process"""
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # --------------------------------------------------
 # Root Endpoint
 # --------------------------------------------------
@@ -5,8 +5,8 @@ from app.models.user import User
 from app.models.hub import Hub
 from app.models.link import Link
 from app.models.rule import Rule
-from app.models.analytics import HubVisit, LinkClick
+from app.models.analytics import HubVisit, LinkClick, HubStatsBucket
 from app.models.short_url import ShortURL
 
-__all__ = ["User", "Hub", "Link", "Rule", "HubVisit", "LinkClick", "ShortURL"]
+__all__ = ["User", "Hub", "Link", "Rule", "HubVisit", "LinkClick", "HubStatsBucket", "ShortURL"]
 
@@ -4,7 +4,7 @@ Tracks hub visits and link clicks for analytics
 """
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, BigInteger
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -53,3 +53,21 @@ class LinkClick(Base):
     def __repr__(self):
         return f"<LinkClick {self.link_id} at {self.clicked_at}>"
 
+
+class HubStatsBucket(Base):
+    """
+    Pre-aggregated visit and click counts per hub
+
+    Buckets are fixed 15-minute windows keyed by their start as UTC epoch
+    seconds, filled by AnalyticsService.refresh_rollups() from the raw
+    hub_visits and link_clicks tables.
+    """
+    __tablename__ = "hub_stats_buckets"
+    
+    hub_id = Column(UUID(as_uuid=True), ForeignKey("hubs.id", ondelete="CASCADE"), primary_key=True)
+    bucket_start = Column(BigInteger, primary_key=True, index=True)  # UTC epoch seconds
+    visits = Column(Integer, nullable=False, default=0, server_default="0")
+    clicks = Column(Integer, nullable=False, default=0, server_default="0")
+    
+    def __repr__(self):
+        return f"<HubStatsBucket {self.hub_id} at {self.bucket_start}>"
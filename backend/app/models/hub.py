@@ -33,7 +33,13 @@ class Hub(Base):
     links = relationship("Link", back_populates="hub", cascade="all, delete-orphan", order_by="Link.position")
     rules = relationship("Rule", back_populates="hub", cascade="all, delete-orphan")
     visits = relationship("HubVisit", back_populates="hub", cascade="all, delete-orphan")
-    short_url = relationship("ShortURL", back_populates="hub", cascade="all, delete-orphan", uselist=False)
+    short_urls = relationship("ShortURL", back_populates="hub", cascade="all, delete-orphan")
+    short_url = relationship(
+        "ShortURL",
+        primaryjoin="and_(Hub.id == ShortURL.hub_id, ShortURL.link_id.is_(None))",
+        uselist=False,
+        viewonly=True
+    )
     
     def __repr__(self):
         return f"<Hub {self.slug}>"
@@ -32,6 +32,7 @@ class Link(Base):
     # Relationships
     hub = relationship("Hub", back_populates="links")
     clicks = relationship("LinkClick", back_populates="link", cascade="all, delete-orphan")
+    short_url = relationship("ShortURL", back_populates="link", cascade="all, delete-orphan", uselist=False)
     
     def __repr__(self):
         return f"<Link {self.title}>"
@@ -3,7 +3,10 @@ Smart Link Hub - Short URL Model
 """
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Boolean
+from sqlalchemy import (
+    Column, String, Integer, SmallInteger, DateTime, ForeignKey, Boolean, Sequence, Index,
+    CheckConstraint, text
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -14,20 +17,45 @@ def utc_now():
     return datetime.now(timezone.utc)
 
 
+# Feeds new short codes (see app.utils.short_codes); one value per code,
+# bounded by the 7-character base62 code space
+short_code_seq = Sequence(
+    "short_code_seq", start=1, minvalue=1, maxvalue=62 ** 7 - 1, metadata=Base.metadata
+)
+
+
 class ShortURL(Base):
-    """Short URL model for URL shortening feature"""
+    """
+    Short URL model for URL shortening feature
+    
+    A short URL either points at a hub page (link_id is NULL, one per hub)
+    or directly at one of the hub's links (one per link).
+    """
     __tablename__ = "short_urls"
+    __table_args__ = (
+        Index(
+            "uq_short_urls_hub_id_hub_level", "hub_id",
+            unique=True, postgresql_where=text("link_id IS NULL")
+        ),
+        CheckConstraint(
+            "redirect_status IN (301, 302, 307, 308)", name="ck_short_urls_redirect_status"
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    hub_id = Column(UUID(as_uuid=True), ForeignKey("hubs.id", ondelete="CASCADE"), nullable=False, unique=True)
+    hub_id = Column(UUID(as_uuid=True), ForeignKey("hubs.id", ondelete="CASCADE"), nullable=False, index=True)
+    link_id = Column(UUID(as_uuid=True), ForeignKey("links.id", ondelete="CASCADE"), nullable=True, unique=True)
     short_code = Column(String(10), unique=True, nullable=False, index=True)
     click_count = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
+    redirect_status = Column(SmallInteger, nullable=False, default=307, server_default="307")
+    cache_max_age = Column(Integer, nullable=True)  # Seconds; 301/308 only, None = default
     created_at = Column(DateTime(timezone=True), default=utc_now)
     updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
     
-    # Relationship
-    hub = relationship("Hub", back_populates="short_url")
+    # Relationships
+    hub = relationship("Hub", back_populates="short_urls")
+    link = relationship("Link", back_populates="short_url")
     
     def __repr__(self):
         return f"<ShortURL {self.short_code}>"
@@ -3,7 +3,7 @@ Smart Link Hub - User Model
 """
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Boolean, Index, false, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -22,11 +22,17 @@ class User(Base):
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     name = Column(String(100), nullable=False)
+    is_admin = Column(Boolean, default=False, server_default=false(), nullable=False)  # Admin API access
     created_at = Column(DateTime(timezone=True), default=utc_now)
     updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
     
     # Relationships
     hubs = relationship("Hub", back_populates="owner", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Emails are matched case-insensitively
+        Index("uq_users_email_lower", func.lower(email), unique=True),
+    )
+    
     def __repr__(self):
         return f"<User {self.email}>"
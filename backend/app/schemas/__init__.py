@@ -6,7 +6,8 @@ from app.schemas.user import (
 )
 from app.schemas.hub import (
     HubCreate, HubUpdate, HubResponse, HubListResponse, 
-    HubPublicResponse, ProcessedLinkResponse, ThemeConfig
+    HubPublicResponse, ProcessedLinkResponse, ThemeConfig, BulkQRCodeRequest,
+    BulkShortURLRequest, ShortURLMapping, BulkShortURLResponse, ShortURLUpdate
 )
 from app.schemas.link import (
     LinkCreate, LinkUpdate, LinkResponse, LinkListResponse, LinkReorderRequest
@@ -16,7 +17,8 @@ from app.schemas.rule import (
 )
 from app.schemas.analytics import (
     AnalyticsSummary, LinkPerformance, LinkPerformanceList,
-    DailyStats, DailyStatsResponse, TopLinksResponse
+    DailyStats, DailyStatsResponse, TimeSeriesResponse, TopLinksResponse,
+    HubOverview, AccountOverviewResponse, ReportJobResponse
 )
 
 __all__ = [
@@ -24,12 +26,14 @@ __all__ = [
     "UserCreate", "UserLogin", "UserResponse", "Token", "TokenPayload",
     # Hub
     "HubCreate", "HubUpdate", "HubResponse", "HubListResponse",
-    "HubPublicResponse", "ProcessedLinkResponse", "ThemeConfig",
+    "HubPublicResponse", "ProcessedLinkResponse", "ThemeConfig", "BulkQRCodeRequest",
+    "BulkShortURLRequest", "ShortURLMapping", "BulkShortURLResponse", "ShortURLUpdate",
     # Link
     "LinkCreate", "LinkUpdate", "LinkResponse", "LinkListResponse", "LinkReorderRequest",
     # Rule
     "RuleCreate", "RuleUpdate", "RuleResponse", "RuleListResponse", "RulePresets",
     # Analytics
     "AnalyticsSummary", "LinkPerformance", "LinkPerformanceList",
-    "DailyStats", "DailyStatsResponse", "TopLinksResponse"
+    "DailyStats", "DailyStatsResponse", "TimeSeriesResponse", "TopLinksResponse",
+    "HubOverview", "AccountOverviewResponse", "ReportJobResponse"
 ]
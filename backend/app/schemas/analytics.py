@@ -48,6 +48,7 @@ class DailyStats(BaseModel):
     date: str
     visits: int
     clicks: int
+    ctr: float = 0
 
 
 class DailyStatsResponse(BaseModel):
@@ -56,12 +57,56 @@ class DailyStatsResponse(BaseModel):
     period_days: int
 
 
+class TimeSeriesResponse(BaseModel):
+    """Gap-filled time series with visits, clicks and CTR as aligned columns"""
+    granularity: str
+    timezone: str
+    buckets: List[str] = Field(..., description="Bucket start labels in the requested timezone")
+    visits: List[int]
+    clicks: List[int]
+    ctr: List[float]
+    period_days: int
+
+
+class HubOverview(BaseModel):
+    """Per-hub metrics for the account dashboard"""
+    hub_id: str
+    title: str
+    slug: str
+    is_active: bool
+    total_visits: int
+    total_clicks: int
+    ctr: float
+    sparkline: List[int] = Field(..., description="Daily visits aligned with AccountOverviewResponse.buckets")
+
+
+class AccountOverviewResponse(BaseModel):
+    """Metrics for every hub a user owns"""
+    hubs: List[HubOverview]
+    buckets: List[str]
+    total_visits: int
+    total_clicks: int
+    ctr: float
+    period_days: int
+
+
 class TopLinksResponse(BaseModel):
     """Top performing and least performing links"""
     top_links: List[LinkPerformance]
     bottom_links: List[LinkPerformance]
     
     
+class ReportJobResponse(BaseModel):
+    """Status of a background report export"""
+    job_id: str
+    hub_id: str
+    status: str = Field(..., description="queued, collecting, rendering, done or failed")
+    progress: float
+    error: Optional[str] = None
+    filename: str
+    download_url: Optional[str] = None
+
+
 class AnalyticsExportRequest(BaseModel):
     """Request for exporting analytics"""
     start_date: Optional[date] = None
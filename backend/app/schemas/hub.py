@@ -2,7 +2,7 @@
 Smart Link Hub - Hub Schemas
 """
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from pydantic import BaseModel, Field, field_validator
 from uuid import UUID
 import re
@@ -65,6 +65,60 @@ class HubListResponse(BaseModel):
     total: int
 
 
+class BulkQRCodeRequest(BaseModel):
+    """Schema for downloading QR codes of many hubs as one ZIP"""
+    hub_ids: List[UUID] = Field(..., min_length=1, max_length=1000)
+    size: int = Field(256, ge=128, le=512)
+    fg_color: str = Field("#22C55E", pattern=r"^#?[0-9a-fA-F]{6}$")
+    bg_color: str = Field("#000000", pattern=r"^#?[0-9a-fA-F]{6}$")
+    format: str = Field("png", pattern=r"^(png|svg)$")
+
+
+class ShortURLUpdate(BaseModel):
+    """
+    Schema for updating a short URL
+    
+    301/308 redirects are sent with `Cache-Control: public, max-age=cache_max_age`
+    (capped server-side) so browsers and CDNs can answer repeat scans;
+    302/307 redirects are never cached.
+    """
+    is_active: Optional[bool] = None
+    redirect_status: Optional[Literal[301, 302, 307, 308]] = None
+    cache_max_age: Optional[int] = Field(None, ge=0, description="Seconds; null uses the default")
+    
+    @field_validator("is_active", "redirect_status")
+    @classmethod
+    def not_null(cls, v):
+        """Omit these to leave them unchanged; only cache_max_age accepts null"""
+        if v is None:
+            raise ValueError("may not be null")
+        return v
+
+
+class BulkShortURLRequest(BaseModel):
+    """Schema for creating or looking up short URLs of many hubs"""
+    hub_ids: List[UUID] = Field(..., min_length=1, max_length=10000)
+
+
+class ShortURLMapping(BaseModel):
+    """A hub's short URL"""
+    hub_id: UUID
+    hub_slug: str
+    short_code: str
+    short_url: str
+    full_short_url: str
+    click_count: int = 0
+    is_active: bool = True
+    created: bool = False
+
+
+class BulkShortURLResponse(BaseModel):
+    """Schema for bulk short URL responses"""
+    short_urls: List[ShortURLMapping]
+    created: int = 0
+    missing: List[UUID] = Field(default_factory=list, description="Hubs without a short URL")
+
+
 class HubPublicResponse(BaseModel):
     """Schema for public hub display"""
     title: str
@@ -2,28 +2,59 @@
 Smart Link Hub - Analytics Service
 Handles tracking, aggregation, and reporting of hub visits and link clicks
 """
+import calendar
 import hashlib
+import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Tuple
-from sqlalchemy import func, and_
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, and_, select, BigInteger
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from app.models.analytics import HubVisit, LinkClick
+from app.database import SessionLocal
+from app.models.analytics import HubVisit, LinkClick, HubStatsBucket
 from app.models.hub import Hub
 from app.models.link import Link
+from app.services.timeseries import (
+    ROLLUP_BUCKET_SECONDS, bucket_edges, bin_counts, ctr_column
+)
+from app.utils.shared_state import get_shared_state, run_shared
+
+logger = logging.getLogger(__name__)
+
+
+def _bucket_expr(column):
+    """SQL expression flooring a timestamp column to its rollup bucket (epoch seconds)"""
+    epoch = func.extract("epoch", column)
+    return (func.floor(epoch / ROLLUP_BUCKET_SECONDS) * ROLLUP_BUCKET_SECONDS).cast(BigInteger)
+
+
+def _epoch_to_datetime(epoch: int) -> datetime:
+    """Convert UTC epoch seconds to a naive UTC datetime (matches stored timestamps)"""
+    return datetime.utcfromtimestamp(epoch)
 
 
 class AnalyticsService:
     """Service for tracking and analyzing user interactions"""
     
-    # Simple in-memory rate limiter (use Redis in production)
-    _visit_cache: Dict[str, datetime] = {}
+    # Visit dedup window, shared by all workers (see RATE_LIMIT_BACKEND)
     RATE_LIMIT_SECONDS = 60  # 1 visit per minute per IP per hub
     
+    # Account overview sort options -> result field
+    OVERVIEW_SORT_KEYS = {
+        "visits": "total_visits",
+        "clicks": "total_clicks",
+        "ctr": "ctr",
+        "title": "title"
+    }
+    
     def __init__(self, db: Session):
         self.db = db
     
-    def _is_bot(self, user_agent: str) -> bool:
+    @staticmethod
+    def _is_bot(user_agent: str) -> bool:
         """Simple bot detection based on user agent"""
         if not user_agent:
             return True
@@ -42,27 +73,13 @@ class AnalyticsService:
         """Generate unique key for rate limiting"""
         return hashlib.md5(f"{hub_id}:{visitor_ip}".encode()).hexdigest()
     
-    def _is_rate_limited(self, key: str) -> bool:
-        """Check if visitor is rate limited"""
-        last_visit = self._visit_cache.get(key)
-        if last_visit:
-            if datetime.utcnow() - last_visit < timedelta(seconds=self.RATE_LIMIT_SECONDS):
-                return True
-        return False
-    
-    def _update_rate_limit(self, key: str) -> None:
-        """Update rate limit timestamp"""
-        self._visit_cache[key] = datetime.utcnow()
-        
-        # Cleanup old entries periodically
-        if len(self._visit_cache) > 10000:
-            cutoff = datetime.utcnow() - timedelta(minutes=10)
-            self._visit_cache = {
-                k: v for k, v in self._visit_cache.items()
-                if v > cutoff
-            }
+    async def _is_rate_limited(self, key: str) -> bool:
+        """Check if visitor is rate limited, claiming the window if not"""
+        state = get_shared_state()
+        return not await run_shared(state.first_seen, f"visit:{key}", self.RATE_LIMIT_SECONDS)
     
-    def _anonymize_ip(self, ip: str) -> Optional[str]:
+    @staticmethod
+    def _anonymize_ip(ip: str) -> Optional[str]:
         """Anonymize IP for privacy (remove last octet for IPv4)"""
         if not ip:
             return None
@@ -75,7 +92,7 @@ class AnalyticsService:
             return ip.split(":")[0] + "::"
         return ip
     
-    def track_visit(
+    async def track_visit(
         self,
         hub_id: str,
         visitor_ip: Optional[str],
@@ -95,7 +112,7 @@ class AnalyticsService:
         
         # Rate limiting
         rate_key = self._get_rate_limit_key(hub_id, visitor_ip or "unknown")
-        if self._is_rate_limited(rate_key):
+        if await self._is_rate_limited(rate_key):
             return False, "Rate limited"
         
         # Record visit
@@ -110,7 +127,6 @@ class AnalyticsService:
         self.db.add(visit)
         self.db.commit()
         
-        self._update_rate_limit(rate_key)
         return True, "Visit recorded"
     
     def track_click(
@@ -241,42 +257,225 @@ class AnalyticsService:
         hub_id: str,
         days: int = 30
     ) -> List[Dict[str, Any]]:
-        """Get daily visit and click counts"""
-        cutoff = datetime.utcnow() - timedelta(days=days)
+        """Get daily visit and click counts (UTC days, gaps filled with zeros)"""
+        series = self.get_time_series(hub_id, days, granularity="day", tz="UTC")
+        return [
+            {"date": date, "visits": visits, "clicks": clicks, "ctr": ctr}
+            for date, visits, clicks, ctr in zip(
+                series["buckets"], series["visits"], series["clicks"], series["ctr"]
+            )
+        ]
+    
+    def get_time_series(
+        self,
+        hub_id: str,
+        days: int = 30,
+        granularity: str = "day",
+        tz: str = "UTC"
+    ) -> Dict[str, Any]:
+        """
+        Get a gap-filled visit/click/CTR time series
         
-        # Daily visits
-        visit_results = self.db.query(
-            func.date(HubVisit.visited_at).label("date"),
-            func.count(HubVisit.id).label("count")
-        ).filter(
-            and_(HubVisit.hub_id == hub_id, HubVisit.visited_at >= cutoff)
-        ).group_by(func.date(HubVisit.visited_at)).all()
-        daily_visits = {str(r.date): r.count for r in visit_results}
+        Buckets are aligned to `granularity` boundaries in timezone `tz`.
+        Visits, clicks and CTR are returned as aligned columns.
         
-        # Daily clicks
-        click_results = self.db.query(
-            func.date(LinkClick.clicked_at).label("date"),
-            func.count(LinkClick.id).label("count")
-        ).filter(
-            and_(LinkClick.hub_id == hub_id, LinkClick.clicked_at >= cutoff)
-        ).group_by(func.date(LinkClick.clicked_at)).all()
-        daily_clicks = {str(r.date): r.count for r in click_results}
+        Raises:
+            ValueError: If granularity or timezone is invalid
+        """
+        edges, labels = bucket_edges(days, granularity, tz)
+        hub_index, epochs, visits, clicks = self._load_buckets(
+            [hub_id], int(edges[0]), int(edges[-1])
+        )
+        visit_counts = bin_counts(hub_index, epochs, visits, edges)[0]
+        click_counts = bin_counts(hub_index, epochs, clicks, edges)[0]
+        
+        return {
+            "granularity": granularity,
+            "timezone": tz,
+            "buckets": labels,
+            "visits": visit_counts.tolist(),
+            "clicks": click_counts.tolist(),
+            "ctr": ctr_column(visit_counts, click_counts).tolist(),
+            "period_days": days
+        }
+    
+    def get_account_overview(
+        self,
+        user_id: str,
+        days: int = 30,
+        tz: str = "UTC",
+        sort: str = "visits",
+        order: str = "desc"
+    ) -> Dict[str, Any]:
+        """
+        Get visits, clicks, CTR and a daily visit sparkline for every hub a user owns
+        
+        Uses a fixed number of grouped queries regardless of how many hubs
+        the user has.
+        
+        Raises:
+            ValueError: If the timezone is invalid
+        """
+        hubs = self.db.query(
+            Hub.id, Hub.title, Hub.slug, Hub.is_active
+        ).filter(Hub.user_id == user_id).all()
         
-        # Combine into single timeline
-        all_dates = set(daily_visits.keys()) | set(daily_clicks.keys())
-        stats = [
+        edges, labels = bucket_edges(days, "day", tz)
+        hub_ids = [str(h.id) for h in hubs]
+        visits = np.zeros((len(hubs), len(labels)), dtype=np.int64)
+        clicks = np.zeros((len(hubs), len(labels)), dtype=np.int64)
+        if hubs:
+            hub_index, epochs, visit_counts, click_counts = self._load_buckets(
+                hub_ids, int(edges[0]), int(edges[-1])
+            )
+            visits = bin_counts(hub_index, epochs, visit_counts, edges, len(hubs))
+            clicks = bin_counts(hub_index, epochs, click_counts, edges, len(hubs))
+        
+        total_visits = visits.sum(axis=1)
+        total_clicks = clicks.sum(axis=1)
+        ctr = ctr_column(total_visits, total_clicks)
+        
+        overview = [
             {
-                "date": date,
-                "visits": daily_visits.get(date, 0),
-                "clicks": daily_clicks.get(date, 0)
+                "hub_id": hub_ids[i],
+                "title": hub.title,
+                "slug": hub.slug,
+                "is_active": bool(hub.is_active),
+                "total_visits": int(total_visits[i]),
+                "total_clicks": int(total_clicks[i]),
+                "ctr": float(ctr[i]),
+                "sparkline": visits[i].tolist()
             }
-            for date in sorted(all_dates)
+            for i, hub in enumerate(hubs)
         ]
+        sort_key = self.OVERVIEW_SORT_KEYS[sort]
+        overview.sort(
+            key=lambda h: h[sort_key].lower() if sort == "title" else h[sort_key],
+            reverse=(order == "desc")
+        )
+        
+        account_visits = int(total_visits.sum())
+        account_clicks = int(total_clicks.sum())
+        return {
+            "hubs": overview,
+            "buckets": labels,
+            "total_visits": account_visits,
+            "total_clicks": account_clicks,
+            "ctr": round((account_clicks / account_visits * 100), 2) if account_visits > 0 else 0,
+            "period_days": days
+        }
+    
+    def _rollup_watermark(self) -> Optional[int]:
+        """End (exclusive, epoch seconds) of the range already covered by rollups"""
+        last = self.db.query(func.max(HubStatsBucket.bucket_start)).scalar()
+        return int(last) + ROLLUP_BUCKET_SECONDS if last is not None else None
+    
+    def _load_buckets(
+        self,
+        hub_ids: Sequence[str],
+        start: int,
+        end: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Load 15-minute visit/click counts for hubs in [start, end)
+        
+        Completed buckets come from the rollup table; only the tail after the
+        rollup watermark is grouped from raw events.
+        
+        Returns:
+            Tuple of (hub index into hub_ids, bucket epoch, visits, clicks) arrays
+        """
+        positions = {str(h): i for i, h in enumerate(hub_ids)}
+        watermark = self._rollup_watermark()
+        raw_from = start if watermark is None else min(max(watermark, start), end)
+        
+        rows: List[Tuple[int, int, int, int]] = []
         
-        return stats
+        if raw_from > start:
+            rollups = self.db.query(
+                HubStatsBucket.hub_id,
+                HubStatsBucket.bucket_start,
+                HubStatsBucket.visits,
+                HubStatsBucket.clicks
+            ).filter(
+                HubStatsBucket.hub_id.in_(hub_ids),
+                HubStatsBucket.bucket_start >= start,
+                HubStatsBucket.bucket_start < raw_from
+            ).all()
+            rows.extend(
+                (positions[str(h)], b, v, c) for h, b, v, c in rollups
+            )
+        
+        raw_start, raw_end = _epoch_to_datetime(raw_from), _epoch_to_datetime(end)
+        for model, ts_column, is_visit in (
+            (HubVisit, HubVisit.visited_at, True),
+            (LinkClick, LinkClick.clicked_at, False),
+        ):
+            bucket = _bucket_expr(ts_column)
+            tail = self.db.query(
+                model.hub_id, bucket, func.count(model.id)
+            ).filter(
+                model.hub_id.in_(hub_ids),
+                ts_column >= raw_start,
+                ts_column < raw_end
+            ).group_by(model.hub_id, bucket).all()
+            rows.extend(
+                (positions[str(h)], b, n, 0) if is_visit else (positions[str(h)], b, 0, n)
+                for h, b, n in tail
+            )
+        
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty, empty
+        
+        data = np.asarray(rows, dtype=np.int64)
+        return data[:, 0], data[:, 1], data[:, 2], data[:, 3]
+    
+    def refresh_rollups(self) -> None:
+        """
+        Aggregate completed 15-minute buckets of raw events into hub_stats_buckets
+        
+        Recomputes everything from the newest existing bucket onwards, so the
+        job is idempotent and picks up rows that landed just after a refresh.
+        """
+        now = calendar.timegm(datetime.utcnow().timetuple())
+        until = now - now % ROLLUP_BUCKET_SECONDS
+        last = self.db.query(func.max(HubStatsBucket.bucket_start)).scalar()
+        
+        for model, ts_column, counter in (
+            (HubVisit, HubVisit.visited_at, "visits"),
+            (LinkClick, LinkClick.clicked_at, "clicks"),
+        ):
+            bucket = _bucket_expr(ts_column)
+            conditions = [ts_column < _epoch_to_datetime(until)]
+            if last is not None:
+                conditions.append(ts_column >= _epoch_to_datetime(int(last)))
+            aggregated = select(
+                model.hub_id, bucket, func.count(model.id)
+            ).where(*conditions).group_by(model.hub_id, bucket)
+            
+            stmt = insert(HubStatsBucket).from_select(
+                ["hub_id", "bucket_start", counter], aggregated
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["hub_id", "bucket_start"],
+                set_={counter: getattr(stmt.excluded, counter)}
+            )
+            self.db.execute(stmt)
+        
+        self.db.commit()
     
     def get_total_visits(self, hub_id: str) -> int:
         """Get total visit count for a hub (all time)"""
         return self.db.query(func.count(HubVisit.id)).filter(
             HubVisit.hub_id == hub_id
         ).scalar() or 0
+
+
+def refresh_analytics_rollups() -> None:
+    """Background job entry point: refresh rollups in a dedicated session"""
+    db = SessionLocal()
+    try:
+        AnalyticsService(db).refresh_rollups()
+    finally:
+        db.close()
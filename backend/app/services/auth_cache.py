@@ -0,0 +1,134 @@
+"""
+Smart Link Hub - Authentication Cache
+Verified access tokens and user principals kept in memory between requests
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import settings
+from app.models.user import User
+from app.utils.security import decode_token
+
+
+class TokenCache:
+    """
+    Access tokens that already passed signature verification
+
+    Keyed by the SHA-256 of the token so raw tokens are never kept. An
+    entry lives until the token's own `exp`, so caching never extends a
+    token's lifetime; invalid tokens are not cached.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[str, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def verify(self, token: str) -> Optional[str]:
+        """Return the user ID of a valid access token, or None"""
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    return entry[0]
+                del self._entries[key]
+
+        payload = decode_token(token)
+        if not payload or payload.get("type") != "access" or not payload.get("sub"):
+            return None
+
+        user_id, expires_at = payload["sub"], payload.get("exp")
+        if expires_at:
+            with self._lock:
+                self._entries[key] = (user_id, float(expires_at))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return user_id
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Forget every token of a user"""
+        with self._lock:
+            for key in [k for k, (uid, _) in self._entries.items() if uid == user_id]:
+                del self._entries[key]
+
+
+class PrincipalCache:
+    """
+    Recently authenticated users
+
+    Entries are detached snapshots of the user's columns. `get` merges the
+    snapshot into the request's session without loading it, so the route
+    receives a regular persistent User and no SELECT is issued. Snapshots
+    are dropped whenever a user row is updated or deleted through the ORM,
+    and expire after a short TTL to bound staleness from other workers.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[User, float]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, db: Session, user_id: str) -> Optional[User]:
+        """Return the user attached to `db`, loading it on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] <= now:
+                del self._entries[user_id]
+                entry = None
+        if entry is not None:
+            return db.merge(entry[0], load=False)
+
+        fresh = not db.in_transaction()
+        user = db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            return None
+
+        snapshot = User(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            is_admin=user.is_admin,
+            created_at=user.created_at,
+            updated_at=user.updated_at
+        )
+        make_transient_to_detached(snapshot)
+        with self._lock:
+            self._entries[user_id] = (snapshot, now + self.ttl_seconds)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        if fresh:
+            # Nothing else used the session yet: end the read transaction so
+            # the connection isn't held idle for the rest of the request
+            db.rollback()
+            return db.merge(snapshot, load=False)
+        return user
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+# Singleton instances
+token_cache = TokenCache(settings.AUTH_CACHE_SIZE)
+principal_cache = PrincipalCache(settings.AUTH_CACHE_SIZE, settings.AUTH_PRINCIPAL_TTL_SECONDS)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    user_id = str(target.id)
+    principal_cache.invalidate(user_id)
+    token_cache.invalidate_user(user_id)
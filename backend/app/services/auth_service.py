@@ -3,14 +3,14 @@ Smart Link Hub - Authentication Service
 Handles user registration, login, and token management
 """
 from typing import Optional, Tuple
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from uuid import UUID
 
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, Token
-from app.utils.security import (
-    hash_password, verify_password, create_tokens, verify_refresh_token
-)
+from app.services.password_hasher import password_hasher
+from app.utils.security import create_tokens, verify_refresh_token
 
 
 class AuthService:
@@ -19,22 +19,30 @@ class AuthService:
     def __init__(self, db: Session):
         self.db = db
     
-    def register(self, user_data: UserCreate) -> Tuple[Optional[User], str]:
+    async def register(self, user_data: UserCreate) -> Tuple[Optional[User], str]:
         """
         Register a new user
         
         Returns:
             Tuple of (user, error_message)
+        
+        Raises:
+            PasswordHasherBusyError: If the password hashing pool is saturated
         """
-        # Check if email already exists
-        existing = self.db.query(User).filter(User.email == user_data.email).first()
+        # Check if email already exists (in any case)
+        email = user_data.email.lower()
+        existing = self.db.query(User).filter(func.lower(User.email) == email).first()
         if existing:
             return None, "Email already registered"
         
+        # Don't hold a pooled connection while waiting for the hash
+        self.db.close()
+        password_hash = await password_hasher.hash(user_data.password)
+        
         # Create user
         user = User(
-            email=user_data.email,
-            password_hash=hash_password(user_data.password),
+            email=email,
+            password_hash=password_hash,
             name=user_data.name
         )
         self.db.add(user)
@@ -43,24 +51,31 @@ class AuthService:
         
         return user, ""
     
-    def login(self, credentials: UserLogin) -> Tuple[Optional[Token], str]:
+    async def login(self, credentials: UserLogin) -> Tuple[Optional[Token], str]:
         """
         Authenticate user and return tokens
         
         Returns:
             Tuple of (tokens, error_message)
+        
+        Raises:
+            PasswordHasherBusyError: If the password hashing pool is saturated
         """
         # Find user
-        user = self.db.query(User).filter(User.email == credentials.email).first()
+        user = self.db.query(User).filter(func.lower(User.email) == credentials.email.lower()).first()
         if not user:
             return None, "Invalid email or password"
         
+        user_id, password_hash = user.id, user.password_hash
+        # Don't hold a pooled connection while waiting for bcrypt
+        self.db.close()
+        
         # Verify password
-        if not verify_password(credentials.password, user.password_hash):
+        if not await password_hasher.verify(credentials.password, password_hash):
             return None, "Invalid email or password"
         
         # Create tokens
-        access_token, refresh_token = create_tokens(user.id)
+        access_token, refresh_token = create_tokens(user_id)
         
         return Token(
             access_token=access_token,
@@ -4,10 +4,213 @@ Generates CSV and PDF reports for analytics data
 """
 import io
 import csv
+import zlib
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from uuid import UUID
 
+from sqlalchemy import select, literal, null
+
+from app.database import AnalyticsSessionLocal
+from app.models.analytics import HubVisit, LinkClick
+from app.utils.streams import ChunkSink
+
+# Columns of the raw event export
+EVENT_COLUMNS = [
+    "event_type", "occurred_at", "link_id", "device_type", "country",
+    "visitor_ip", "user_agent"
+]
+
+
+def _event_queries(hub_id: str, start_date: datetime, end_date: datetime):
+    """Select statements for visits then clicks of a hub, oldest first"""
+    visits = select(
+        literal("visit"), HubVisit.visited_at, null(), HubVisit.device_type,
+        HubVisit.country, HubVisit.visitor_ip, HubVisit.user_agent
+    ).where(
+        HubVisit.hub_id == hub_id,
+        HubVisit.visited_at >= start_date,
+        HubVisit.visited_at < end_date
+    ).order_by(HubVisit.visited_at)
+    clicks = select(
+        literal("click"), LinkClick.clicked_at, LinkClick.link_id, LinkClick.device_type,
+        LinkClick.country, LinkClick.visitor_ip, LinkClick.user_agent
+    ).where(
+        LinkClick.hub_id == hub_id,
+        LinkClick.clicked_at >= start_date,
+        LinkClick.clicked_at < end_date
+    ).order_by(LinkClick.clicked_at)
+    return visits, clicks
+
+
+def stream_events_csv(
+    hub_id: str,
+    start_date: datetime,
+    end_date: datetime,
+    compress: bool = False,
+    batch_size: int = 2000,
+) -> Iterator[bytes]:
+    """
+    Stream raw visit and click events for a hub as CSV chunks.
+    
+    Rows are read through a server-side cursor in batches of `batch_size`,
+    so memory use does not depend on the number of events. Uses its own
+    session, which stays open until the iterator is exhausted or closed.
+    With `compress`, chunks form a single gzip stream.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    
+    def drain() -> bytes:
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+        return compressor.compress(data) if compressor else data
+    
+    # Send the header before touching the database for a fast first byte
+    writer.writerow(EVENT_COLUMNS)
+    yield drain()
+    
+    db = AnalyticsSessionLocal()
+    try:
+        for stmt in _event_queries(hub_id, start_date, end_date):
+            result = db.execute(stmt.execution_options(yield_per=batch_size))
+            for rows in result.partitions():
+                for event_type, occurred_at, link_id, device, country, ip, ua in rows:
+                    writer.writerow([
+                        event_type,
+                        occurred_at.isoformat() if occurred_at else "",
+                        link_id or "",
+                        device or "",
+                        country or "",
+                        ip or "",
+                        ua or ""
+                    ])
+                chunk = drain()
+                if chunk:
+                    yield chunk
+    finally:
+        db.close()
+    
+    if compressor:
+        yield compressor.flush()
+
+
+def _columnar_schema(table: str):
+    """Arrow schema for a raw event table export"""
+    import pyarrow as pa
+    
+    fields = [
+        ("hub_id", pa.string()),
+        ("occurred_at", pa.timestamp("us", tz="UTC")),
+    ]
+    if table == "clicks":
+        fields.append(("link_id", pa.string()))
+    fields += [
+        ("device_type", pa.dictionary(pa.int8(), pa.string())),
+        ("country", pa.dictionary(pa.int16(), pa.string())),
+        ("visitor_ip", pa.string()),
+        ("user_agent", pa.string()),
+    ]
+    return pa.schema(fields)
+
+
+def _encode_batch(schema, rows, dictionaries: Dict[str, list]):
+    """
+    Build a record batch from result rows
+    
+    Dictionary fields are encoded against the fixed value lists in
+    `dictionaries`, so every batch shares one dictionary per field (Arrow
+    IPC files don't allow replacing a dictionary between batches).
+    """
+    import pyarrow as pa
+    
+    arrays = []
+    for field, column in zip(schema, zip(*rows)):
+        if field.name in ("hub_id", "link_id"):
+            column = [str(v) if v is not None else None for v in column]
+        if pa.types.is_dictionary(field.type):
+            values = dictionaries[field.name]
+            positions = {value: i for i, value in enumerate(values)}
+            indices = pa.array([positions.get(v) for v in column], type=field.type.index_type)
+            arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(values, type=pa.string())))
+        else:
+            arrays.append(pa.array(column, type=field.type))
+    return pa.record_batch(arrays, schema=schema)
+
+
+def stream_events_columnar(
+    table: str,
+    start_date: datetime,
+    end_date: datetime,
+    hub_id: Optional[str] = None,
+    file_format: str = "parquet",
+    row_group_size: int = 50000,
+) -> Iterator[bytes]:
+    """
+    Stream hub_visits or link_clicks rows as a Parquet or Arrow IPC file.
+    
+    Rows are read through a server-side cursor and written one row group
+    (Parquet) or record batch (Arrow) at a time; each group's bytes are
+    yielded as soon as they are encoded. device_type and country are
+    dictionary-encoded with one dictionary per file, read up front in the
+    same snapshot as the rows. Exports every hub when `hub_id` is None.
+    
+    Requires pyarrow.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    if table == "visits":
+        model, ts_column, link_column = HubVisit, HubVisit.visited_at, None
+    elif table == "clicks":
+        model, ts_column, link_column = LinkClick, LinkClick.clicked_at, LinkClick.link_id
+    else:
+        raise ValueError(f"Unknown table: {table}")
+    
+    schema = _columnar_schema(table)
+    columns = [model.hub_id, ts_column] + ([link_column] if link_column is not None else [])
+    columns += [model.device_type, model.country, model.visitor_ip, model.user_agent]
+    conditions = [ts_column >= start_date, ts_column < end_date]
+    if hub_id:
+        conditions.append(model.hub_id == hub_id)
+    stmt = select(*columns).where(*conditions).order_by(ts_column)
+    stmt = stmt.execution_options(yield_per=row_group_size)
+    
+    sink = ChunkSink()
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    elif file_format == "arrow":
+        writer = pa.ipc.new_file(sink, schema)
+    else:
+        raise ValueError(f"Unknown format: {file_format}")
+    
+    db = AnalyticsSessionLocal()
+    try:
+        # One snapshot for the dictionaries and the rows, so no row can
+        # carry a value that is missing from its field's dictionary
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        dictionaries = {
+            column.key: sorted(
+                value for value in db.scalars(select(column).where(*conditions).distinct())
+                if value is not None
+            )
+            for column in (model.device_type, model.country)
+        }
+        for rows in db.execute(stmt).partitions():
+            batch = _encode_batch(schema, rows, dictionaries)
+            if file_format == "parquet":
+                writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        db.close()
+    
+    writer.close()
+    yield sink.drain()
+
 
 def generate_csv_report(
     hub_title: str,
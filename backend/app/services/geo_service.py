@@ -59,6 +59,19 @@ class GeoService:
         
         return None
     
+    def get_cached_country(self, ip: Optional[str]) -> Optional[str]:
+        """
+        Get country from earlier lookups only (never calls the API)
+        
+        For hot paths and batch jobs that must not wait on the network.
+        
+        Returns:
+            2-letter ISO country code or None if unknown
+        """
+        if not ip:
+            return None
+        return self._cache.get(ip)
+    
     def get_country_safe(self, ip: str, default: str = "US") -> str:
         """
         Get country with fallback default
@@ -0,0 +1,163 @@
+"""
+Smart Link Hub - Hub Quota Service
+Per-hub request rate and concurrency quotas for public traffic
+"""
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from threading import Lock
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.notifications import notification_listener, notify
+from app.utils.rate_limiter import check_rate_limit_async, create_rate_limiter
+
+metrics.counter("hub_quota_exceeded_total", "Public requests over their hub's quota")
+
+# Cross-worker snapshot invalidations; the payload is the changed hub's slug
+CHANNEL = "hub_pages"
+
+SnapshotKey = Tuple[str, str, str]  # (slug, device type, country)
+
+
+class HubQuotas:
+    """
+    Isolates hubs from each other's public traffic
+
+    Each hub (keyed by slug) gets a request rate - shared across workers
+    when RATE_LIMIT_BACKEND is shared - and a cap on requests in flight per
+    worker, so a viral hub can't hold every pooled DB connection. Requests
+    over quota skip the database: public pages are served from the last
+    rendered snapshot for the same visitor context, tracking calls are
+    dropped, and anything else is shed with a 503.
+
+    Snapshots are at most `snapshot_max_age` seconds old, and every change
+    to a hub, its links or its rules drops them on all workers.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        burst_size: int,
+        max_concurrent: int,
+        snapshot_max_age: int,
+        max_entries: int = 10000
+    ):
+        self._limiter = create_rate_limiter(
+            "hub", settings.PUBLIC_RATE_LIMIT_ALGORITHM, requests_per_minute, burst_size
+        )
+        self.max_concurrent = max_concurrent
+        self.snapshot_max_age = snapshot_max_age
+        self.max_entries = max_entries
+        self._in_flight: Dict[str, int] = {}
+        self._snapshots: "OrderedDict[SnapshotKey, Tuple[Any, float]]" = OrderedDict()
+        self._link_slugs: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = Lock()
+
+    async def allow(self, slug: str, route: str) -> bool:
+        """Rate quota only, for routes that don't touch the database"""
+        allowed, _ = await check_rate_limit_async(slug, self._limiter)
+        if not allowed:
+            metrics.inc("hub_quota_exceeded_total", route=route, reason="rate")
+        return allowed
+
+    @asynccontextmanager
+    async def admit(self, slug: Optional[str], route: str) -> AsyncIterator[bool]:
+        """
+        Hold one of the hub's concurrency slots for the duration of a request
+
+        Yields False if the hub is over its concurrency or rate quota.
+        Requests for an unknown hub (slug None) are always admitted.
+        """
+        if slug is None:
+            yield True
+            return
+
+        with self._lock:
+            in_flight = self._in_flight.get(slug, 0)
+            if in_flight >= self.max_concurrent:
+                admitted = False
+                metrics.inc("hub_quota_exceeded_total", route=route, reason="concurrency")
+            else:
+                self._in_flight[slug] = in_flight + 1
+                admitted = True
+
+        if not admitted:
+            yield False
+            return
+
+        try:
+            yield await self.allow(slug, route)
+        finally:
+            with self._lock:
+                remaining = self._in_flight[slug] - 1
+                if remaining:
+                    self._in_flight[slug] = remaining
+                else:
+                    del self._in_flight[slug]
+
+    def store_snapshot(self, slug: str, device_type: str, country: str, page: Any) -> None:
+        """Remember a rendered public page"""
+        key = (slug, device_type, country)
+        with self._lock:
+            self._snapshots[key] = (page, time.monotonic())
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self.max_entries:
+                self._snapshots.popitem(last=False)
+
+    def snapshot(self, slug: str, device_type: str, country: str) -> Optional[Any]:
+        """Last rendered page for this context, if recent enough"""
+        with self._lock:
+            entry = self._snapshots.get((slug, device_type, country))
+        if entry is None or time.monotonic() - entry[1] > self.snapshot_max_age:
+            return None
+        return entry[0]
+
+    def listen(self) -> None:
+        """Drop snapshots when other workers change a hub"""
+        notification_listener.subscribe(CHANNEL, self._drop_snapshots, resync=self._drop_all_snapshots)
+
+    def forget_hub(self, slug: str) -> None:
+        """Drop a hub's snapshots on every worker (after the hub, a link or a rule changed)"""
+        self._drop_snapshots(slug)
+        notify(CHANNEL, slug)
+
+    def _drop_snapshots(self, slug: str) -> None:
+        with self._lock:
+            for key in [key for key in self._snapshots if key[0] == slug]:
+                del self._snapshots[key]
+
+    def _drop_all_snapshots(self) -> None:
+        with self._lock:
+            self._snapshots.clear()
+
+    def cleanup(self) -> None:
+        """Drop expired snapshots and idle limiter keys (periodic job)"""
+        cutoff = time.monotonic() - self.snapshot_max_age
+        with self._lock:
+            for key in [key for key, (_, at) in self._snapshots.items() if at < cutoff]:
+                del self._snapshots[key]
+        self._limiter.cleanup()
+
+    def link_slug(self, link_id: str) -> Optional[str]:
+        """Hub slug of a link seen before (links never change hubs)"""
+        with self._lock:
+            return self._link_slugs.get(link_id)
+
+    def remember_link(self, link_id: str, slug: str) -> None:
+        """Cache a link's hub slug so over-quota clicks skip the lookup"""
+        with self._lock:
+            self._link_slugs[link_id] = slug
+            self._link_slugs.move_to_end(link_id)
+            while len(self._link_slugs) > self.max_entries:
+                self._link_slugs.popitem(last=False)
+
+
+# Singleton instance
+hub_quotas = HubQuotas(
+    requests_per_minute=settings.HUB_RATE_LIMIT_PER_MINUTE,
+    burst_size=settings.HUB_RATE_LIMIT_BURST,
+    max_concurrent=settings.HUB_MAX_CONCURRENT_REQUESTS,
+    snapshot_max_age=settings.HUB_SNAPSHOT_MAX_AGE_SECONDS
+)
@@ -0,0 +1,229 @@
+"""
+Smart Link Hub - Live Analytics Service
+In-memory per-second visit/click counters streamed to dashboards over SSE
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, Optional, Set
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LiveCapacityError(Exception):
+    """Raised when a worker already serves the maximum number of live subscribers"""
+
+
+class LiveSubscriber:
+    """A single SSE connection with a small bounded outbox"""
+
+    __slots__ = ("hub_id", "queue", "dropped")
+
+    def __init__(self, hub_id: str, queue_size: int):
+        self.hub_id = hub_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class HubLiveState:
+    """Ring buffer of per-second counts and recent events for one hub"""
+
+    __slots__ = ("seconds", "visits", "clicks", "recent", "pending", "subscribers")
+
+    def __init__(self, window: int, recent_events: int):
+        self.seconds = [0] * window  # epoch second each slot currently holds
+        self.visits = [0] * window
+        self.clicks = [0] * window
+        self.recent: deque = deque(maxlen=recent_events)
+        self.pending: list = []  # events since the last tick
+        self.subscribers: Set[LiveSubscriber] = set()
+
+    def counts_at(self, second: int):
+        """Return (visits, clicks) recorded during the given epoch second"""
+        slot = second % len(self.seconds)
+        if self.seconds[slot] != second:
+            return 0, 0
+        return self.visits[slot], self.clicks[slot]
+
+
+class LiveAnalytics:
+    """
+    Per-hub live counters fed directly by the tracking endpoints
+
+    State only exists for hubs with at least one subscriber, so memory is
+    bounded by (subscribed hubs x window) plus a few queued messages per
+    subscriber. One payload is serialized per hub per tick and shared by all
+    of its subscribers; subscribers whose outbox is full are dropped.
+    Counters are per worker process.
+    """
+
+    WINDOW_SECONDS = 60
+    RECENT_EVENTS = 20
+    QUEUE_SIZE = 5
+
+    def __init__(self, max_subscribers: int = 5000):
+        self.max_subscribers = max_subscribers
+        self._hubs: Dict[str, HubLiveState] = {}
+        self._subscriber_count = 0
+        self._ticker: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        hub_id: str,
+        event_type: str,
+        device_type: Optional[str] = None,
+        country: Optional[str] = None,
+        link_id: Optional[str] = None
+    ) -> None:
+        """Record a visit or click (no-op when nobody is watching the hub)"""
+        state = self._hubs.get(hub_id)
+        if state is None:
+            return
+
+        now = time.time()
+        second = int(now)
+        slot = second % self.WINDOW_SECONDS
+        if state.seconds[slot] != second:
+            state.seconds[slot] = second
+            state.visits[slot] = 0
+            state.clicks[slot] = 0
+        if event_type == "visit":
+            state.visits[slot] += 1
+        else:
+            state.clicks[slot] += 1
+
+        event = {
+            "type": event_type,
+            "at": round(now, 3),
+            "device_type": device_type,
+            "country": country
+        }
+        if link_id:
+            event["link_id"] = link_id
+        state.recent.append(event)
+        if len(state.pending) < self.RECENT_EVENTS:
+            state.pending.append(event)
+
+    def subscribe(self, hub_id: str) -> LiveSubscriber:
+        """
+        Register a subscriber for a hub
+
+        Raises:
+            LiveCapacityError: If the per-worker subscriber limit is reached
+        """
+        if self._subscriber_count >= self.max_subscribers:
+            raise LiveCapacityError("Too many live subscribers")
+
+        state = self._hubs.get(hub_id)
+        if state is None:
+            state = HubLiveState(self.WINDOW_SECONDS, self.RECENT_EVENTS)
+            self._hubs[hub_id] = state
+
+        subscriber = LiveSubscriber(hub_id, self.QUEUE_SIZE)
+        state.subscribers.add(subscriber)
+        self._subscriber_count += 1
+
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.create_task(self._tick_loop(), name="live-analytics")
+        return subscriber
+
+    def unsubscribe(self, subscriber: LiveSubscriber) -> None:
+        """Remove a subscriber, dropping hub state when it was the last one"""
+        state = self._hubs.get(subscriber.hub_id)
+        if state is None or subscriber not in state.subscribers:
+            return
+        state.subscribers.discard(subscriber)
+        self._subscriber_count -= 1
+        if not state.subscribers:
+            del self._hubs[subscriber.hub_id]
+
+    async def stream(self, subscriber: LiveSubscriber) -> AsyncIterator[bytes]:
+        """Yield SSE frames for a subscriber until it disconnects or is dropped"""
+        try:
+            yield b"retry: 3000\n\n"
+            state = self._hubs.get(subscriber.hub_id)
+            if state is not None:
+                yield self._format("snapshot", self._snapshot(state))
+            while True:
+                message = await subscriber.queue.get()
+                if subscriber.dropped:
+                    break
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def shutdown(self) -> None:
+        """End every open stream (called on application shutdown)"""
+        for state in list(self._hubs.values()):
+            for subscriber in list(state.subscribers):
+                self._drop(subscriber)
+        if self._ticker is not None:
+            self._ticker.cancel()
+
+    async def _tick_loop(self) -> None:
+        """Broadcast the last completed second to all subscribers, once per second"""
+        second = int(time.time())
+        while self._hubs:
+            # Wake just after `second` has fully elapsed
+            await asyncio.sleep(max(0.0, second + 1.001 - time.time()))
+            try:
+                self._broadcast(second)
+            except Exception as e:
+                logger.warning(f"Live analytics broadcast failed: {e}")
+            # Skip ahead rather than replaying seconds if the loop fell behind
+            second = max(second + 1, int(time.time()) - 1)
+
+    def _broadcast(self, second: int) -> None:
+        for state in list(self._hubs.values()):
+            visits, clicks = state.counts_at(second)
+            payload = {
+                "ts": second,
+                "visits": visits,
+                "clicks": clicks,
+                "visits_window": self._window_total(state.visits, state.seconds, second),
+                "clicks_window": self._window_total(state.clicks, state.seconds, second),
+                "events": state.pending
+            }
+            state.pending = []
+            message = self._format("tick", payload)
+            for subscriber in list(state.subscribers):
+                try:
+                    subscriber.queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    self._drop(subscriber)
+
+    def _drop(self, subscriber: LiveSubscriber) -> None:
+        """Disconnect a subscriber; its stream ends at the next queue read"""
+        subscriber.dropped = True
+        self.unsubscribe(subscriber)
+        try:
+            subscriber.queue.put_nowait(b"")
+        except asyncio.QueueFull:
+            pass  # Stream will see the flag after draining
+
+    def _window_total(self, counts: list, seconds: list, second: int) -> int:
+        oldest = second - self.WINDOW_SECONDS
+        return sum(c for c, s in zip(counts, seconds) if oldest < s <= second)
+
+    def _snapshot(self, state: HubLiveState) -> dict:
+        now = int(time.time())
+        series = [state.counts_at(s) for s in range(now - self.WINDOW_SECONDS, now)]
+        return {
+            "ts": now,
+            "window_seconds": self.WINDOW_SECONDS,
+            "visits": [v for v, _ in series],
+            "clicks": [c for _, c in series],
+            "recent": list(state.recent)
+        }
+
+    @staticmethod
+    def _format(event: str, data: dict) -> bytes:
+        return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+# Singleton instance
+live_analytics = LiveAnalytics(max_subscribers=settings.LIVE_MAX_SUBSCRIBERS)
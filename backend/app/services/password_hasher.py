@@ -0,0 +1,63 @@
+"""
+Smart Link Hub - Password Hashing Service
+Runs bcrypt in a bounded worker pool so logins don't block the event loop
+"""
+import asyncio
+
+from app.config import settings
+from app.utils.executors import get_thread_pool
+from app.utils.security import hash_password, verify_password
+
+POOL_NAME = "passwords"
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when too many password hashes are already queued"""
+
+
+class PasswordHasher:
+    """
+    Async bcrypt hashing and verification
+
+    bcrypt releases the GIL, so a small thread pool keeps the CPU work off
+    the event loop without the pickling overhead of a process pool. Each
+    hash costs a few hundred milliseconds, so instead of letting a login
+    storm build an unbounded backlog (and time out clients anyway), calls
+    beyond `max_pending` fail fast with PasswordHasherBusyError.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pending = 0  # Only touched from the event loop
+
+    @property
+    def pending(self) -> int:
+        """Hashes running or waiting for a worker"""
+        return self._pending
+
+    async def hash(self, password: str) -> str:
+        """Hash a password"""
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            raise PasswordHasherBusyError("Too many authentication requests, try again shortly")
+
+        self._pending += 1
+        try:
+            pool = get_thread_pool(POOL_NAME, self.max_workers)
+            return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+        finally:
+            self._pending -= 1
+
+
+# Singleton instance
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_PENDING
+)
@@ -0,0 +1,237 @@
+"""
+Smart Link Hub - QR Code Cache
+Content-addressed cache of rendered QR codes (memory LRU + disk)
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+import zipfile
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.qr_service import generate_qr_code, RENDER_VERSION
+from app.utils.executors import get_process_pool, reset_executor
+from app.utils.streams import ChunkSink
+
+logger = logging.getLogger(__name__)
+
+POOL_NAME = "qr"
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml"
+}
+
+_HEX_COLOR = re.compile(r"^#?[0-9a-fA-F]{6}$")
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+def normalize_color(color: str) -> str:
+    """
+    Normalize a hex color to '#rrggbb'
+
+    Raises:
+        ValueError: If the color isn't a 6-digit hex value
+    """
+    if not _HEX_COLOR.match(color or ""):
+        raise ValueError(f"Invalid color: {color}")
+    return "#" + color.lstrip("#").lower()
+
+
+def qr_digest(url: str, size: int, fg_color: str, bg_color: str, format: str) -> str:
+    """Cache key for a rendered QR code"""
+    key = "\x1f".join((str(RENDER_VERSION), url, str(size), fg_color, bg_color, format))
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class QRCache:
+    """
+    Rendered QR codes keyed by a hash of their inputs
+
+    The same inputs always produce the same bytes, so entries never need
+    invalidation: a changed slug or color simply hashes to a new key. Hot
+    entries live in a byte-bounded LRU, everything else on disk. Misses are
+    rendered in a process pool, and concurrent requests for the same key
+    share one render.
+    """
+
+    def __init__(self, cache_dir: str, max_memory_bytes: int, max_workers: int):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_workers = max_workers
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = Lock()
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def path(self, digest: str, format: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.{format}")
+
+    async def get_or_render(
+        self,
+        url: str,
+        size: int,
+        fg_color: str,
+        bg_color: str,
+        format: str = "png"
+    ) -> Tuple[str, bytes]:
+        """
+        Return (digest, image bytes), rendering on a miss
+
+        Raises:
+            ValueError: If a color is invalid
+        """
+        fg_color = normalize_color(fg_color)
+        bg_color = normalize_color(bg_color)
+        digest = qr_digest(url, size, fg_color, bg_color, format)
+
+        content = await self.get(digest, format)
+        if content is not None:
+            return digest, content
+
+        future = self._inflight.get(digest)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._render(digest, url, size, fg_color, bg_color, format)
+            )
+            self._inflight[digest] = future
+            future.add_done_callback(lambda _: self._inflight.pop(digest, None))
+        return digest, await asyncio.shield(future)
+
+    async def get(self, digest: str, format: str = "png") -> Optional[bytes]:
+        """Look up a rendered code by digest (memory first, then disk)"""
+        if not _DIGEST.match(digest) or format not in MEDIA_TYPES:
+            return None
+
+        name = f"{digest}.{format}"
+        with self._lock:
+            content = self._memory.get(name)
+            if content is not None:
+                self._memory.move_to_end(name)
+                return content
+
+        content = await asyncio.to_thread(self._read, self.path(digest, format))
+        if content is not None:
+            self._remember(name, content)
+        return content
+
+    async def _render(
+        self,
+        digest: str,
+        url: str,
+        size: int,
+        fg_color: str,
+        bg_color: str,
+        format: str
+    ) -> bytes:
+        pool = get_process_pool(POOL_NAME, self.max_workers)
+        loop = asyncio.get_running_loop()
+        try:
+            content = await loop.run_in_executor(
+                pool, generate_qr_code, url, size, format, fg_color, bg_color
+            )
+        except BrokenProcessPool:
+            reset_executor(POOL_NAME)
+            raise
+
+        self._remember(f"{digest}.{format}", content)
+        try:
+            await asyncio.to_thread(self._write, self.path(digest, format), content)
+        except OSError as e:
+            logger.warning(f"Could not persist QR code {digest}: {e}")
+        return content
+
+    def _remember(self, name: str, content: bytes) -> None:
+        with self._lock:
+            if name in self._memory:
+                self._memory.move_to_end(name)
+                return
+            self._memory[name] = content
+            self._memory_bytes += len(content)
+            while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    async def stream_zip(
+        self,
+        entries: List[Tuple[str, str]],
+        size: int,
+        fg_color: str,
+        bg_color: str,
+        format: str = "png"
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a ZIP of QR codes for (filename, url) entries
+
+        Entries are written in completion order while at most two renders
+        per worker are in flight, so memory stays bounded by that window
+        regardless of how many codes are requested.
+
+        Raises:
+            ValueError: If a color is invalid
+        """
+        fg_color = normalize_color(fg_color)
+        bg_color = normalize_color(bg_color)
+        # PNGs are already compressed; SVG text deflates well
+        compress_type = zipfile.ZIP_DEFLATED if format == "svg" else zipfile.ZIP_STORED
+        window = max(1, self.max_workers * 2)
+
+        sink = ChunkSink()
+        pending: Dict[asyncio.Future, str] = {}
+        remaining = iter(entries)
+        try:
+            with zipfile.ZipFile(sink, "w") as archive:
+                while True:
+                    for filename, url in remaining:
+                        task = asyncio.ensure_future(
+                            self.get_or_render(url, size, fg_color, bg_color, format)
+                        )
+                        pending[task] = filename
+                        if len(pending) >= window:
+                            break
+                    if not pending:
+                        break
+
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        _, content = task.result()
+                        info = zipfile.ZipInfo(pending.pop(task), time.localtime()[:6])
+                        info.compress_type = compress_type
+                        archive.writestr(info, content)
+                    yield sink.drain()
+            yield sink.drain()
+        finally:
+            # Client went away or a render failed
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def _read(path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write(path: str, content: bytes) -> None:
+        """Write atomically so concurrent readers never see partial files"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+
+# Singleton instance
+qr_cache = QRCache(
+    settings.QR_CACHE_DIR,
+    settings.QR_CACHE_MEMORY_MB * 1024 * 1024,
+    settings.QR_WORKERS
+)
@@ -6,9 +6,12 @@ import io
 import base64
 from typing import Literal
 import qrcode
+from PIL import Image, ImageOps
 from qrcode.image.styledpil import StyledPilImage
 from qrcode.image.styles.moduledrawers import RoundedModuleDrawer
-from qrcode.image.styles.colormasks import SolidFillColorMask
+
+# Bump whenever rendering output changes so cached images are not reused
+RENDER_VERSION = 2
 
 
 def generate_qr_code(
@@ -21,6 +24,10 @@ def generate_qr_code(
     """
     Generate a QR code image for the given URL.
     
+    PNGs are drawn at the largest whole module size that fits and centered
+    on a size x size canvas, so modules stay crisp without resampling. SVGs
+    are a single vector path and scale freely.
+    
     Args:
         url: The URL to encode
         size: Size of the QR code in pixels (128-512)
@@ -44,40 +51,69 @@ def generate_qr_code(
     qr.add_data(url)
     qr.make(fit=True)
     
-    # Convert hex colors to RGB tuples
-    def hex_to_rgb(hex_color: str) -> tuple:
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    if format == "svg":
+        return _render_svg(qr, size, fg_color, bg_color)
+    
+    # Largest module size whose image still fits the target
+    modules = qr.modules_count + 2 * qr.border
+    qr.box_size = max(1, size // modules)
     
-    fg_rgb = hex_to_rgb(fg_color)
-    bg_rgb = hex_to_rgb(bg_color)
+    fg_rgb = _hex_to_rgb(fg_color)
+    bg_rgb = _hex_to_rgb(bg_color)
     
-    # Generate styled image
+    # Draw black-on-white, then map the grayscale ramp onto the colors.
+    # (A color mask can't tell modules from a black background apart.)
     img = qr.make_image(
         image_factory=StyledPilImage,
-        module_drawer=RoundedModuleDrawer(),
-        color_mask=SolidFillColorMask(
-            back_color=bg_rgb,
-            front_color=fg_rgb,
-        )
-    )
+        module_drawer=RoundedModuleDrawer()
+    ).get_image().convert("L")
+    img = ImageOps.colorize(img, black=fg_rgb, white=bg_rgb)
     
-    # Resize to requested size
-    img = img.resize((size, size))
+    # Pad (never resample) to the requested size
+    if img.size != (size, size):
+        canvas = Image.new("RGB", (size, size), bg_rgb)
+        canvas.paste(img, ((size - img.size[0]) // 2, (size - img.size[1]) // 2))
+        img = canvas
     
     # Convert to bytes
     buffer = io.BytesIO()
-    if format == "svg":
-        # For SVG, we'd need a different approach
-        # For now, return PNG for both
-        img.save(buffer, format="PNG")
-    else:
-        img.save(buffer, format="PNG")
-    
-    buffer.seek(0)
+    img.save(buffer, format="PNG")
     return buffer.getvalue()
 
 
+def _render_svg(qr: qrcode.QRCode, size: int, fg_color: str, bg_color: str) -> bytes:
+    """Render a QR code as a single SVG path, one subpath per run of dark modules"""
+    matrix = qr.get_matrix()
+    n = len(matrix)
+    
+    subpaths = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < n:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < n and row[x]:
+                x += 1
+            subpaths.append(f"M{start} {y}h{x - start}v1h-{x - start}z")
+    
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+        f'viewBox="0 0 {n} {n}" shape-rendering="crispEdges">'
+        f'<rect width="{n}" height="{n}" fill="{bg_color}"/>'
+        f'<path fill="{fg_color}" d="{"".join(subpaths)}"/>'
+        f'</svg>'
+    )
+    return svg.encode("utf-8")
+
+
+def _hex_to_rgb(hex_color: str) -> tuple:
+    """Convert a hex color to an RGB tuple"""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
 def generate_qr_code_base64(
     url: str,
     size: int = 256,
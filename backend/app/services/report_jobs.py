@@ -0,0 +1,230 @@
+"""
+Smart Link Hub - Report Job Service
+Renders PDF analytics reports in a process pool and caches them on disk
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import AnalyticsSessionLocal
+from app.models.analytics import HubVisit, LinkClick
+from app.models.hub import Hub
+from app.models.link import Link
+from app.services.analytics_service import AnalyticsService
+from app.services.export_service import generate_pdf_report
+from app.utils.executors import get_process_pool, reset_executor
+
+logger = logging.getLogger(__name__)
+
+POOL_NAME = "reports"
+
+
+@dataclass
+class ReportJob:
+    """State of a single report render"""
+    job_id: str
+    hub_id: str
+    days: int
+    filename: str
+    status: str = "queued"  # queued, collecting, rendering, done, failed
+    progress: float = 0.0
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "hub_id": self.hub_id,
+            "status": self.status,
+            "progress": self.progress,
+            "error": self.error,
+            "filename": self.filename
+        }
+
+
+class ReportJobQueue:
+    """
+    Async PDF export jobs
+
+    Job IDs are the artifact cache key, derived from (hub, date range, data
+    watermark). A repeat request for unchanged data finds the finished file
+    on disk - also after a restart or on another worker - and is served
+    without rendering again.
+    """
+
+    JOB_RETENTION_SECONDS = 3600
+
+    def __init__(self, export_dir: str, max_workers: int = 2):
+        self.export_dir = export_dir
+        self.max_workers = max_workers
+        self._jobs: Dict[str, ReportJob] = {}
+
+    def artifact_path(self, hub_id: str, job_id: str) -> str:
+        return os.path.join(self.export_dir, hub_id, f"{job_id}.pdf")
+
+    def _watermark(self, db: Session, hub: Hub, start: datetime) -> str:
+        """Fingerprint of everything the report depends on"""
+        visits = db.query(func.count(HubVisit.id), func.max(HubVisit.visited_at)).filter(
+            HubVisit.hub_id == hub.id, HubVisit.visited_at >= start
+        ).one()
+        clicks = db.query(func.count(LinkClick.id), func.max(LinkClick.clicked_at)).filter(
+            LinkClick.hub_id == hub.id, LinkClick.clicked_at >= start
+        ).one()
+        links = db.query(func.count(Link.id), func.max(Link.updated_at)).filter(
+            Link.hub_id == hub.id
+        ).one()
+        return f"{tuple(visits)}|{tuple(clicks)}|{tuple(links)}|{hub.title}|{hub.slug}"
+
+    def submit(self, db: Session, hub: Hub, days: int) -> ReportJob:
+        """Queue a report for rendering, or return the existing/cached job"""
+        self._prune()
+
+        end = datetime.utcnow()
+        start = end - timedelta(days=days)
+        key_source = f"{hub.id}|{start.date()}|{end.date()}|{self._watermark(db, hub, start)}"
+        job_id = hashlib.sha256(key_source.encode()).hexdigest()[:32]
+
+        job = self._jobs.get(job_id)
+        if job is not None and job.status != "failed":
+            return job
+
+        job = ReportJob(
+            job_id=job_id,
+            hub_id=str(hub.id),
+            days=days,
+            filename=f"{hub.slug}-analytics-{end.strftime('%Y%m%d')}.pdf"
+        )
+        self._jobs[job_id] = job
+
+        if os.path.exists(self.artifact_path(job.hub_id, job_id)):
+            job.status, job.progress, job.finished_at = "done", 1.0, time.time()
+        else:
+            job.task = asyncio.create_task(self._run(job, hub.title, hub.slug))
+        return job
+
+    def get(self, job_id: str, hub: Hub) -> Optional[ReportJob]:
+        """Look up a job of a hub, falling back to a finished artifact on disk"""
+        hub_id = str(hub.id)
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job if job.hub_id == hub_id else None
+
+        path = self.artifact_path(hub_id, job_id)
+        if not os.path.exists(path):
+            return None
+        finished_at = os.path.getmtime(path)
+        return ReportJob(
+            job_id=job_id,
+            hub_id=hub_id,
+            days=0,
+            filename=f"{hub.slug}-analytics-{datetime.utcfromtimestamp(finished_at).strftime('%Y%m%d')}.pdf",
+            status="done",
+            progress=1.0,
+            finished_at=finished_at
+        )
+
+    async def wait(self, job: ReportJob) -> ReportJob:
+        """Wait for a job to finish"""
+        if job.task is not None:
+            await asyncio.shield(job.task)
+        return job
+
+    async def _run(self, job: ReportJob, hub_title: str, hub_slug: str) -> None:
+        try:
+            job.status, job.progress = "collecting", 0.1
+            data = await asyncio.to_thread(self._collect, job.hub_id, job.days)
+
+            job.status, job.progress = "rendering", 0.5
+            end_date = datetime.utcnow()
+            pool = get_process_pool(POOL_NAME, self.max_workers)
+            loop = asyncio.get_running_loop()
+            try:
+                pdf_bytes = await loop.run_in_executor(
+                    pool, _render, hub_title, hub_slug, data,
+                    end_date - timedelta(days=job.days), end_date
+                )
+            except BrokenProcessPool:
+                reset_executor(POOL_NAME)
+                raise
+
+            job.progress = 0.9
+            await asyncio.to_thread(self._store, job.hub_id, job.job_id, pdf_bytes)
+            job.status, job.progress = "done", 1.0
+        except Exception as e:
+            logger.error(f"Report job {job.job_id} failed: {e}")
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.finished_at = time.time()
+
+    @staticmethod
+    def _collect(hub_id: str, days: int) -> dict:
+        """Gather report data in a worker thread with a dedicated session"""
+        db = AnalyticsSessionLocal()
+        try:
+            analytics = AnalyticsService(db)
+            return {
+                "analytics_data": analytics.get_hub_analytics(hub_id, days),
+                "link_performance": analytics.get_link_performance(hub_id, days),
+                "daily_stats": analytics.get_daily_stats(hub_id, days)
+            }
+        finally:
+            db.close()
+
+    def _store(self, hub_id: str, job_id: str, content: bytes) -> None:
+        """Write an artifact atomically so readers never see partial files"""
+        path = self.artifact_path(hub_id, job_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _prune(self) -> None:
+        """Forget finished jobs after a while (artifacts stay on disk)"""
+        cutoff = time.time() - self.JOB_RETENTION_SECONDS
+        for job_id in [
+            j.job_id for j in self._jobs.values()
+            if j.finished_at is not None and j.finished_at < cutoff
+        ]:
+            del self._jobs[job_id]
+
+    def cleanup_artifacts(self) -> None:
+        """Delete artifacts older than the retention period"""
+        if not os.path.isdir(self.export_dir):
+            return
+        cutoff = time.time() - settings.EXPORT_RETENTION_HOURS * 3600
+        for root, _, files in os.walk(self.export_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    pass
+
+
+def _render(hub_title, hub_slug, data, start_date, end_date) -> bytes:
+    """Process pool entry point"""
+    return generate_pdf_report(
+        hub_title=hub_title,
+        hub_slug=hub_slug,
+        start_date=start_date,
+        end_date=end_date,
+        **data
+    )
+
+
+# Singleton instance
+report_jobs = ReportJobQueue(settings.EXPORT_DIR, settings.REPORT_WORKERS)
@@ -0,0 +1,353 @@
+"""
+Smart Link Hub - Short URL Map
+Resident short_code -> redirect target map with asynchronous click counting
+"""
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict, defaultdict
+from threading import Lock
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, select, update
+
+from app.database import IngestSessionLocal, PublicSessionLocal, SessionLocal
+from app.models.hub import Hub
+from app.models.link import Link
+from app.models.short_url import ShortURL
+from app.utils.notifications import notification_listener, notify
+
+logger = logging.getLogger(__name__)
+
+# Cross-worker invalidations; the payload is the changed hub's id
+CHANNEL = "short_url_map"
+
+
+class ShortURLTarget:
+    """Where a short code redirects to: a hub page, or one link's URL when link_id is set"""
+
+    __slots__ = (
+        "hub_id", "slug", "is_active", "hub_active", "link_id", "url", "link_enabled",
+        "redirect_status", "cache_max_age"
+    )
+
+    def __init__(
+        self,
+        hub_id: str,
+        slug: str,
+        is_active: bool,
+        hub_active: bool,
+        link_id: Optional[str] = None,
+        url: Optional[str] = None,
+        link_enabled: bool = True,
+        redirect_status: int = 307,
+        cache_max_age: Optional[int] = None
+    ):
+        self.hub_id = hub_id
+        self.slug = slug
+        self.is_active = is_active
+        self.hub_active = hub_active
+        self.link_id = link_id
+        self.url = url
+        self.link_enabled = link_enabled
+        self.redirect_status = redirect_status
+        self.cache_max_age = cache_max_age
+
+
+class ShortURLMap:
+    """
+    In-memory map of every short code
+
+    Loaded at startup and refreshed periodically. The API routes that
+    create short URLs or change hubs and links update it directly, so the
+    local worker sees changes immediately; each change also notifies every
+    other worker (PostgreSQL NOTIFY), which reloads that hub's codes from
+    the database. Changes made while `load` reads the table are recorded
+    and re-applied after the new map is swapped in. Codes missing from
+    the map are looked up once in a worker thread; unknown codes are
+    remembered for a short time so scanning for codes can't hammer the
+    database.
+
+    Redirect clicks are counted here and flushed to `short_urls` in
+    batches by a periodic job.
+    """
+
+    NEGATIVE_CACHE_SIZE = 10000
+    NEGATIVE_TTL_SECONDS = 10
+
+    def __init__(self):
+        self._targets: Dict[str, ShortURLTarget] = {}
+        self._codes_by_hub: Dict[str, Set[str]] = defaultdict(set)  # hub and link codes
+        self._codes_by_link: Dict[str, str] = {}
+        self._misses: "OrderedDict[str, float]" = OrderedDict()
+        self._clicks: Counter = Counter()
+        self._lock = Lock()
+        self._load_lock = Lock()
+        self._replay: Optional[List[Tuple[str, tuple]]] = None  # Changes during a load
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def listen(self) -> None:
+        """Apply other workers' changes (call before the first `load`)"""
+        notification_listener.subscribe(CHANNEL, self.refresh_hub, resync=self.load)
+
+    def load(self) -> None:
+        """(Re)load the whole map from the database"""
+        with self._load_lock:
+            with self._lock:
+                self._replay = []
+            try:
+                self._load()
+            finally:
+                with self._lock:
+                    self._replay = None
+
+    def _load(self) -> None:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                self._target_query().execution_options(yield_per=10000)
+            )
+            targets = {}
+            for row in rows:
+                targets[row.short_code] = self._target_from_row(row)
+        finally:
+            db.close()
+
+        codes_by_hub = defaultdict(set)
+        codes_by_link = {}
+        for code, target in targets.items():
+            codes_by_hub[target.hub_id].add(code)
+            if target.link_id:
+                codes_by_link[target.link_id] = code
+
+        with self._lock:
+            self._targets = targets
+            self._codes_by_hub = codes_by_hub
+            self._codes_by_link = codes_by_link
+            self._misses.clear()
+            # The rows may predate changes made while they were read
+            for change, args in self._replay:
+                getattr(self, change)(*args)
+        logger.debug(f"Short URL map loaded with {len(targets)} codes")
+
+    async def resolve(self, code: str) -> Optional[ShortURLTarget]:
+        """Get the target of a code, or None if it doesn't exist"""
+        target = self._targets.get(code)
+        if target is not None:
+            return target
+
+        expires_at = self._misses.get(code)
+        if expires_at is not None and expires_at > time.monotonic():
+            return None
+
+        target = await asyncio.to_thread(self._lookup, code)
+        if target is None:
+            self._remember_miss(code)
+        return target
+
+    # Changes made by this worker's API routes: applied here, then
+    # announced to all workers
+
+    def put(self, code: str, target: ShortURLTarget) -> None:
+        """Add or replace a short code"""
+        self._apply("_put", code, target)
+        notify(CHANNEL, target.hub_id)
+
+    def update_policy(
+        self,
+        code: str,
+        hub_id: str,
+        is_active: bool,
+        redirect_status: int,
+        cache_max_age: Optional[int]
+    ) -> None:
+        """Apply a short URL's enabled flag and redirect policy"""
+        self._apply("_update_policy", code, is_active, redirect_status, cache_max_age)
+        notify(CHANNEL, hub_id)
+
+    def remove(self, code: str, hub_id: str) -> None:
+        """Forget a deleted short code"""
+        self._apply("_remove", code)
+        notify(CHANNEL, hub_id)
+
+    def update_hub(self, hub_id: str, slug: str, hub_active: bool) -> None:
+        """Apply a hub slug/visibility change to all of its codes"""
+        self._apply("_update_hub", hub_id, slug, hub_active)
+        notify(CHANNEL, hub_id)
+
+    def remove_hub(self, hub_id: str) -> None:
+        """Forget every code of a deleted hub"""
+        self._apply("_replace_hub", hub_id, {})
+        notify(CHANNEL, hub_id)
+
+    def update_link(self, link_id: str, hub_id: str, url: str, enabled: bool) -> None:
+        """Apply a link URL/enabled change to its code"""
+        self._apply("_update_link", link_id, url, enabled)
+        notify(CHANNEL, hub_id)
+
+    def remove_link(self, link_id: str, hub_id: str) -> None:
+        """Forget the code of a deleted link"""
+        self._apply("_remove_link", link_id)
+        notify(CHANNEL, hub_id)
+
+    def refresh_hub(self, hub_id: str) -> None:
+        """Reload one hub's codes from the database (another worker changed them)"""
+        db = PublicSessionLocal()
+        try:
+            rows = db.execute(self._target_query().where(ShortURL.hub_id == hub_id)).all()
+        finally:
+            db.close()
+        self._apply(
+            "_replace_hub", hub_id, {row.short_code: self._target_from_row(row) for row in rows}
+        )
+
+    def _apply(self, change: str, *args: Any) -> None:
+        with self._lock:
+            getattr(self, change)(*args)
+            if self._replay is not None:
+                self._replay.append((change, args))
+
+    # The methods below are called with the lock held
+
+    def _put(self, code: str, target: ShortURLTarget) -> None:
+        self._remove(code)
+        self._targets[code] = target
+        self._codes_by_hub[target.hub_id].add(code)
+        if target.link_id:
+            self._codes_by_link[target.link_id] = code
+        self._misses.pop(code, None)
+
+    def _update_policy(
+        self,
+        code: str,
+        is_active: bool,
+        redirect_status: int,
+        cache_max_age: Optional[int]
+    ) -> None:
+        target = self._targets.get(code)
+        if target is not None:
+            target.is_active = is_active
+            target.redirect_status = redirect_status
+            target.cache_max_age = cache_max_age
+
+    def _remove(self, code: str) -> None:
+        target = self._targets.pop(code, None)
+        if target is not None:
+            self._codes_by_hub[target.hub_id].discard(code)
+            if target.link_id:
+                self._codes_by_link.pop(target.link_id, None)
+
+    def _update_hub(self, hub_id: str, slug: str, hub_active: bool) -> None:
+        for code in self._codes_by_hub.get(hub_id, ()):
+            target = self._targets[code]
+            target.slug = slug
+            target.hub_active = hub_active
+
+    def _replace_hub(self, hub_id: str, targets: Dict[str, ShortURLTarget]) -> None:
+        for code in list(self._codes_by_hub.get(hub_id, ())):
+            if code not in targets:
+                self._remove(code)
+        for code, target in targets.items():
+            self._put(code, target)
+        if not self._codes_by_hub.get(hub_id):
+            self._codes_by_hub.pop(hub_id, None)
+
+    def _update_link(self, link_id: str, url: str, enabled: bool) -> None:
+        code = self._codes_by_link.get(link_id)
+        target = self._targets.get(code) if code is not None else None
+        if target is not None:
+            target.url = url
+            target.link_enabled = enabled
+
+    def _remove_link(self, link_id: str) -> None:
+        code = self._codes_by_link.get(link_id)
+        if code is not None:
+            self._remove(code)
+
+    def record_click(self, code: str) -> None:
+        """Count a redirect; persisted by `flush_clicks`"""
+        with self._lock:
+            self._clicks[code] += 1
+
+    def flush_clicks(self) -> None:
+        """Write pending click counts in one batched UPDATE"""
+        with self._lock:
+            clicks, self._clicks = self._clicks, Counter()
+        if not clicks:
+            return
+
+        stmt = (
+            update(ShortURL.__table__)
+            .where(ShortURL.__table__.c.short_code == bindparam("code"))
+            .values(click_count=ShortURL.__table__.c.click_count + bindparam("delta"))
+        )
+        db = IngestSessionLocal()
+        try:
+            db.connection().execute(
+                stmt, [{"code": code, "delta": delta} for code, delta in clicks.items()]
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Keep the counts for the next flush
+            with self._lock:
+                self._clicks.update(clicks)
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _target_query():
+        return (
+            select(
+                ShortURL.short_code, ShortURL.is_active, ShortURL.link_id,
+                ShortURL.redirect_status, ShortURL.cache_max_age,
+                Hub.id.label("hub_id"), Hub.slug, Hub.is_active.label("hub_active"),
+                Link.url, Link.is_enabled
+            )
+            .join(Hub, Hub.id == ShortURL.hub_id)
+            .outerjoin(Link, Link.id == ShortURL.link_id)
+        )
+
+    @staticmethod
+    def _target_from_row(row) -> ShortURLTarget:
+        return ShortURLTarget(
+            hub_id=str(row.hub_id),
+            slug=row.slug,
+            is_active=row.is_active,
+            hub_active=row.hub_active,
+            link_id=str(row.link_id) if row.link_id else None,
+            url=row.url,
+            link_enabled=row.is_enabled if row.link_id else True,
+            redirect_status=row.redirect_status,
+            cache_max_age=row.cache_max_age
+        )
+
+    def _lookup(self, code: str) -> Optional[ShortURLTarget]:
+        """Load a single code from the database (runs in a worker thread)"""
+        db = PublicSessionLocal()
+        try:
+            row = db.execute(
+                self._target_query().where(ShortURL.short_code == code)
+            ).first()
+        finally:
+            db.close()
+        if row is None:
+            return None
+
+        target = self._target_from_row(row)
+        self._apply("_put", code, target)
+        return target
+
+    def _remember_miss(self, code: str) -> None:
+        with self._lock:
+            self._misses[code] = time.monotonic() + self.NEGATIVE_TTL_SECONDS
+            self._misses.move_to_end(code)
+            while len(self._misses) > self.NEGATIVE_CACHE_SIZE:
+                self._misses.popitem(last=False)
+
+
+# Singleton instance
+short_url_map = ShortURLMap()
@@ -0,0 +1,146 @@
+"""
+Smart Link Hub - Time Series Helpers
+Bucket edge generation and vectorized gap-filled binning for analytics charts
+"""
+import calendar
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+import numpy as np
+import pytz
+
+GRANULARITIES = ("hour", "day", "week", "month")
+
+# Resolution of the pre-aggregated rollup table. Every real-world UTC offset
+# is a multiple of 15 minutes, so local hour/day/week/month boundaries always
+# fall on a rollup bucket boundary.
+ROLLUP_BUCKET_SECONDS = 900
+
+
+def get_timezone(tz: str):
+    """
+    Resolve a timezone name
+
+    Raises:
+        ValueError: If the timezone is unknown
+    """
+    try:
+        return pytz.timezone(tz)
+    except pytz.UnknownTimeZoneError:
+        raise ValueError(f"Unknown timezone: {tz}")
+
+
+def _floor_local(local: datetime, granularity: str) -> datetime:
+    """Floor a naive local datetime to the start of its bucket"""
+    if granularity == "hour":
+        return local.replace(minute=0, second=0, microsecond=0)
+    day = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _next_local(local: datetime, granularity: str) -> datetime:
+    """Advance a naive local bucket start to the next bucket start"""
+    if granularity == "day":
+        return local + timedelta(days=1)
+    if granularity == "week":
+        return local + timedelta(days=7)
+    days_in_month = calendar.monthrange(local.year, local.month)[1]
+    return local + timedelta(days=days_in_month)
+
+
+def _format_label(local: datetime, granularity: str) -> str:
+    """Format a bucket start for display"""
+    if granularity == "hour":
+        return local.strftime("%Y-%m-%dT%H:%M")
+    if granularity == "month":
+        return local.strftime("%Y-%m")
+    return local.strftime("%Y-%m-%d")
+
+
+def bucket_edges(
+    days: int,
+    granularity: str,
+    tz: str = "UTC",
+    now: datetime = None
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Build bucket boundaries covering the last `days` days up to now
+
+    The first bucket is the one containing (now - days) and the last one is
+    the bucket containing now, both in the given timezone.
+
+    Returns:
+        Tuple of (edges as UTC epoch seconds with len(labels) + 1 entries,
+        bucket labels in local time)
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+
+    zone = get_timezone(tz)
+    now = now or datetime.utcnow()
+    now_epoch = calendar.timegm(now.timetuple())
+    start_utc = pytz.utc.localize(now - timedelta(days=days))
+    first_local = _floor_local(start_utc.astimezone(zone).replace(tzinfo=None), granularity)
+
+    edges: List[int] = []
+    labels: List[str] = []
+
+    if granularity == "hour":
+        # Step in absolute time so DST transitions yield 23/25-hour days
+        epoch = int(zone.localize(first_local, is_dst=False).timestamp())
+        while epoch <= now_epoch:
+            local = datetime.fromtimestamp(epoch, zone).replace(tzinfo=None)
+            edges.append(epoch)
+            labels.append(_format_label(local, granularity))
+            epoch += 3600
+        edges.append(epoch)
+    else:
+        local = first_local
+        epoch = int(zone.localize(local, is_dst=False).timestamp())
+        while epoch <= now_epoch:
+            edges.append(epoch)
+            labels.append(_format_label(local, granularity))
+            local = _next_local(local, granularity)
+            epoch = int(zone.localize(local, is_dst=False).timestamp())
+        edges.append(epoch)
+
+    return np.asarray(edges, dtype=np.int64), labels
+
+
+def bin_counts(
+    row_index: np.ndarray,
+    epochs: np.ndarray,
+    counts: np.ndarray,
+    edges: np.ndarray,
+    n_rows: int = 1
+) -> np.ndarray:
+    """
+    Sum counts into dense buckets, filling gaps with zeros
+
+    Args:
+        row_index: Output row (e.g. hub index) for each sample
+        epochs: UTC epoch seconds of each sample's rollup bucket
+        counts: Count carried by each sample
+        edges: Bucket boundaries from bucket_edges()
+        n_rows: Number of output rows
+
+    Returns:
+        int64 array of shape (n_rows, len(edges) - 1)
+    """
+    n_buckets = len(edges) - 1
+    idx = np.searchsorted(edges, epochs, side="right") - 1
+    mask = (idx >= 0) & (idx < n_buckets)
+    flat = row_index[mask] * n_buckets + idx[mask]
+    binned = np.bincount(flat, weights=counts[mask], minlength=n_rows * n_buckets)
+    return binned.astype(np.int64).reshape(n_rows, n_buckets)
+
+
+def ctr_column(visits: np.ndarray, clicks: np.ndarray) -> np.ndarray:
+    """Click-through rate as a percentage, 0 where there were no visits"""
+    ctr = np.zeros(visits.shape, dtype=np.float64)
+    np.divide(clicks * 100.0, visits, out=ctr, where=visits > 0)
+    return np.round(ctr, 2)
@@ -1,52 +1,170 @@
 """
 Smart Link Hub - URL Shortening Service
 """
-import random
-import string
-from typing import Optional
+import logging
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.models.short_url import ShortURL
+from app.models.short_url import ShortURL, short_code_seq
 from app.models.hub import Hub
+from app.models.link import Link
+from app.services.short_url_map import short_url_map, ShortURLTarget
+from app.utils.short_codes import short_code_cipher
 
+logger = logging.getLogger(__name__)
 
-def generate_short_code(length: int = 6) -> str:
-    """Generate a random short code"""
-    chars = string.ascii_letters + string.digits
-    return ''.join(random.choice(chars) for _ in range(length))
+
+def next_short_code(db: Session) -> str:
+    """
+    Allocate a new short code
+    
+    Codes are a keyed permutation of sequence values, so they are unique by
+    construction and need no existence check.
+    """
+    return short_code_cipher.encode(db.scalar(select(short_code_seq.next_value())))
+
+
+def short_url_target(short_url: ShortURL) -> ShortURLTarget:
+    """Redirect target of a short URL (for the in-memory map)"""
+    hub = short_url.hub
+    link = short_url.link
+    return ShortURLTarget(
+        hub_id=str(hub.id),
+        slug=hub.slug,
+        is_active=short_url.is_active,
+        hub_active=hub.is_active,
+        link_id=str(link.id) if link else None,
+        url=link.url if link else None,
+        link_enabled=link.is_enabled if link else True,
+        redirect_status=short_url.redirect_status,
+        cache_max_age=short_url.cache_max_age
+    )
 
 
-def get_unique_short_code(db: Session, length: int = 6, max_attempts: int = 10) -> str:
-    """Generate a unique short code that doesn't exist in database"""
+def _create(db: Session, hub_id, link_id, max_attempts: int) -> ShortURL:
+    """Create the hub-level (link_id=None) or link short URL unless it exists"""
     for _ in range(max_attempts):
-        code = generate_short_code(length)
-        existing = db.query(ShortURL).filter(ShortURL.short_code == code).first()
-        if not existing:
-            return code
-    # If all attempts fail, try longer code
-    return generate_short_code(length + 2)
+        existing = db.query(ShortURL).filter(
+            ShortURL.hub_id == hub_id,
+            ShortURL.link_id == link_id if link_id else ShortURL.link_id.is_(None)
+        ).first()
+        if existing:
+            return existing
+        
+        short_code = next_short_code(db)
+        short_url = ShortURL(
+            hub_id=hub_id,
+            link_id=link_id,
+            short_code=short_code
+        )
+        db.add(short_url)
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request created this short URL first (or
+            # the code key was rotated onto an existing code)
+            db.rollback()
+            continue
+        db.refresh(short_url)
+        
+        short_url_map.put(short_code, short_url_target(short_url))
+        
+        return short_url
+    
+    raise RuntimeError("Could not allocate a short code")
 
 
-def create_short_url(db: Session, hub_id: str) -> ShortURL:
+def create_short_url(db: Session, hub_id: str, max_attempts: int = 3) -> ShortURL:
     """Create a short URL for a hub"""
     from uuid import UUID
+    return _create(db, UUID(hub_id), None, max_attempts)
+
+
+def create_link_short_url(db: Session, link: Link, max_attempts: int = 3) -> ShortURL:
+    """Create a short URL that redirects straight to a link's URL"""
+    return _create(db, link.hub_id, link.id, max_attempts)
+
+
+def bulk_create_short_urls(db: Session, hubs: Sequence, max_attempts: int = 3) -> Dict[str, dict]:
+    """
+    Create hub-level short URLs for many hubs, one transaction per attempt
     
-    # Check if hub already has a short URL
-    existing = db.query(ShortURL).filter(ShortURL.hub_id == UUID(hub_id)).first()
-    if existing:
-        return existing
+    A hub whose row was skipped on conflict either got its short URL from
+    a concurrent request (it is looked up) or hit a taken code (e.g. after
+    the code key was rotated); those are retried with fresh codes.
     
-    # Generate new short code
-    short_code = get_unique_short_code(db)
+    Args:
+        hubs: Rows with id, slug and is_active
     
-    short_url = ShortURL(
-        hub_id=UUID(hub_id),
-        short_code=short_code
-    )
-    db.add(short_url)
-    db.commit()
-    db.refresh(short_url)
+    Returns:
+        hub_id -> {short_code, click_count, is_active, created}; hubs still
+        without a short URL after `max_attempts` are left out
+    """
+    result = get_short_urls_by_hubs(db, [hub.id for hub in hubs])
+    missing = [hub for hub in hubs if str(hub.id) not in result]
+    table = ShortURL.__table__
     
-    return short_url
+    for _ in range(max_attempts):
+        if not missing:
+            break
+        
+        # One round trip for all codes
+        numbers = db.scalars(
+            select(short_code_seq.next_value()).select_from(func.generate_series(1, len(missing)))
+        ).all()
+        
+        inserted = db.execute(
+            pg_insert(table).on_conflict_do_nothing().returning(
+                table.c.hub_id, table.c.short_code, table.c.click_count, table.c.is_active
+            ),
+            [
+                {"hub_id": hub.id, "short_code": short_code_cipher.encode(number)}
+                for hub, number in zip(missing, numbers)
+            ]
+        ).all()
+        db.commit()
+        
+        hubs_by_id = {str(hub.id): hub for hub in missing}
+        for row in inserted:
+            hub = hubs_by_id[str(row.hub_id)]
+            result[str(row.hub_id)] = {
+                "short_code": row.short_code,
+                "click_count": row.click_count,
+                "is_active": row.is_active,
+                "created": True
+            }
+            short_url_map.put(row.short_code, ShortURLTarget(
+                hub_id=str(hub.id), slug=hub.slug, is_active=row.is_active, hub_active=hub.is_active
+            ))
+        
+        # Hubs whose short URL was created concurrently
+        skipped = [hub for hub in missing if str(hub.id) not in result]
+        if skipped:
+            result.update(get_short_urls_by_hubs(db, [hub.id for hub in skipped]))
+        missing = [hub for hub in skipped if str(hub.id) not in result]
+    
+    if missing:
+        logger.warning(f"Could not allocate short codes for {len(missing)} hubs")
+    return result
+
+
+def get_short_urls_by_hubs(db: Session, hub_ids: List) -> Dict[str, dict]:
+    """Existing hub-level short URLs: hub_id -> {short_code, click_count, is_active, created}"""
+    rows = db.execute(
+        select(ShortURL.hub_id, ShortURL.short_code, ShortURL.click_count, ShortURL.is_active)
+        .where(ShortURL.hub_id.in_(hub_ids), ShortURL.link_id.is_(None))
+    )
+    return {
+        str(row.hub_id): {
+            "short_code": row.short_code,
+            "click_count": row.click_count,
+            "is_active": row.is_active,
+            "created": False
+        }
+        for row in rows
+    }
 
 
 def get_short_url_by_code(db: Session, code: str) -> Optional[ShortURL]:
@@ -60,7 +178,16 @@ def get_short_url_by_code(db: Session, code: str) -> Optional[ShortURL]:
 def get_short_url_by_hub(db: Session, hub_id: str) -> Optional[ShortURL]:
     """Get short URL by hub ID"""
     from uuid import UUID
-    return db.query(ShortURL).filter(ShortURL.hub_id == UUID(hub_id)).first()
+    return db.query(ShortURL).filter(
+        ShortURL.hub_id == UUID(hub_id),
+        ShortURL.link_id.is_(None)
+    ).first()
+
+
+def get_short_url_by_link(db: Session, link_id: str) -> Optional[ShortURL]:
+    """Get short URL by link ID"""
+    from uuid import UUID
+    return db.query(ShortURL).filter(ShortURL.link_id == UUID(link_id)).first()
 
 
 def increment_click_count(db: Session, short_url: ShortURL) -> None:
@@ -71,21 +198,39 @@ def increment_click_count(db: Session, short_url: ShortURL) -> None:
 
 def delete_short_url(db: Session, hub_id: str) -> bool:
     """Delete short URL for a hub"""
-    from uuid import UUID
-    short_url = db.query(ShortURL).filter(ShortURL.hub_id == UUID(hub_id)).first()
+    short_url = get_short_url_by_hub(db, hub_id)
     if short_url:
+        short_code = short_url.short_code
         db.delete(short_url)
         db.commit()
+        short_url_map.remove(short_code, str(hub_id))
         return True
     return False
 
 
 def toggle_short_url(db: Session, hub_id: str, active: bool) -> Optional[ShortURL]:
     """Enable or disable a short URL"""
-    from uuid import UUID
-    short_url = db.query(ShortURL).filter(ShortURL.hub_id == UUID(hub_id)).first()
+    short_url = get_short_url_by_hub(db, hub_id)
     if short_url:
-        short_url.is_active = active
-        db.commit()
-        db.refresh(short_url)
+        update_short_url(db, short_url, {"is_active": active})
+    return short_url
+
+
+def update_short_url(db: Session, short_url: ShortURL, changes: dict) -> ShortURL:
+    """
+    Update a short URL's enabled flag and/or redirect policy
+    
+    Args:
+        changes: Subset of is_active, redirect_status, cache_max_age
+    """
+    for field in ("is_active", "redirect_status", "cache_max_age"):
+        if field in changes:
+            setattr(short_url, field, changes[field])
+    db.commit()
+    db.refresh(short_url)
+    
+    short_url_map.update_policy(
+        short_url.short_code, str(short_url.hub_id), short_url.is_active,
+        short_url.redirect_status, short_url.cache_max_age
+    )
     return short_url
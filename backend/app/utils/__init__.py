@@ -8,7 +8,8 @@ from app.utils.security import (
 )
 from app.utils.device_detector import device_detector, get_device_type, DeviceType
 from app.utils.rate_limiter import (
-    RateLimiter, api_rate_limiter, public_rate_limiter, check_rate_limit
+    RateLimiter, GCRALimiter, SharedLimiter, create_rate_limiter,
+    api_rate_limiter, public_rate_limiter, check_rate_limit, check_rate_limit_async
 )
 
 __all__ = [
@@ -19,5 +20,6 @@ __all__ = [
     # Device Detection
     "device_detector", "get_device_type", "DeviceType",
     # Rate Limiting
-    "RateLimiter", "api_rate_limiter", "public_rate_limiter", "check_rate_limit"
+    "RateLimiter", "GCRALimiter", "SharedLimiter", "create_rate_limiter",
+    "api_rate_limiter", "public_rate_limiter", "check_rate_limit", "check_rate_limit_async"
 ]
@@ -0,0 +1,37 @@
+"""
+Smart Link Hub - Background Task Utility
+Periodic jobs started from the application lifespan
+"""
+import asyncio
+import logging
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodic(name: str, interval_seconds: float, job: Callable[[], None]) -> None:
+    """
+    Run a blocking job every `interval_seconds` in a worker thread
+
+    Failures are logged and the loop keeps going; cancel the task to stop it.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(job)
+        except Exception as e:
+            logger.warning(f"Periodic job '{name}' failed: {e}")
+
+
+def start_periodic(tasks: List[asyncio.Task], name: str, interval_seconds: float, job: Callable[[], None]) -> None:
+    """Schedule a periodic job if its interval is enabled (> 0)"""
+    if interval_seconds and interval_seconds > 0:
+        tasks.append(asyncio.create_task(run_periodic(name, interval_seconds, job), name=name))
+
+
+async def stop_periodic(tasks: List[asyncio.Task]) -> None:
+    """Cancel periodic jobs and wait for them to exit"""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    tasks.clear()
@@ -0,0 +1,56 @@
+"""
+Smart Link Hub - Worker Pool Utility
+Named, lazily created thread/process pools for CPU-heavy work off the event loop
+"""
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock
+from typing import Dict
+
+_executors: Dict[str, Executor] = {}
+_lock = Lock()
+
+
+def get_process_pool(name: str, max_workers: int) -> ProcessPoolExecutor:
+    """
+    Get (or create) a named process pool
+
+    Workers are spawned rather than forked so they don't inherit the
+    server's event loop, threads or pooled DB connections.
+    """
+    with _lock:
+        pool = _executors.get(name)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            _executors[name] = pool
+        return pool
+
+
+def get_thread_pool(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """Get (or create) a named thread pool"""
+    with _lock:
+        pool = _executors.get(name)
+        if pool is None:
+            pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+            _executors[name] = pool
+        return pool
+
+
+def reset_executor(name: str) -> None:
+    """Discard a pool (e.g. after BrokenProcessPool) so the next call recreates it"""
+    with _lock:
+        pool = _executors.pop(name, None)
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executors() -> None:
+    """Shut down every pool (called on application shutdown)"""
+    with _lock:
+        pools = list(_executors.values())
+        _executors.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
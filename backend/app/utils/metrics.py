@@ -0,0 +1,82 @@
+"""
+Smart Link Hub - Metrics Utility
+In-process counters and gauges rendered in the Prometheus text format
+"""
+from threading import Lock
+from typing import Callable, Dict, Iterable, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Metrics:
+    """
+    Minimal metrics registry
+
+    Counters are incremented in place; gauges are read from callbacks when
+    the metrics are rendered. Values are per worker process.
+    """
+
+    def __init__(self):
+        self._descriptions: Dict[str, Tuple[str, str]] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[str, Callable[[], Iterable[Tuple[Dict[str, str], float]]]] = {}
+        self._lock = Lock()
+
+    def counter(self, name: str, help_text: str) -> None:
+        """Declare a counter"""
+        self._descriptions[name] = ("counter", help_text)
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]
+    ) -> None:
+        """Declare a gauge; `collect` yields (labels, value) pairs"""
+        self._descriptions[name] = ("gauge", help_text)
+        self._gauges[name] = collect
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        """Increment a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def value(self, name: str, **labels: str) -> float:
+        """Current value of a counter"""
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def render(self) -> str:
+        """Prometheus text exposition of all metrics"""
+        with self._lock:
+            counters = dict(self._counters)
+
+        lines = []
+        for name, (kind, help_text) in sorted(self._descriptions.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "gauge":
+                samples = [(tuple(sorted(labels.items())), value) for labels, value in self._gauges[name]()]
+            else:
+                samples = [(labels, value) for (metric, labels), value in counters.items() if metric == name]
+            for labels, value in sorted(samples):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Singleton instance
+metrics = Metrics()
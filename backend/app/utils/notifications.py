@@ -0,0 +1,133 @@
+"""
+Smart Link Hub - Cross-Worker Notifications
+Invalidation messages between workers over PostgreSQL LISTEN/NOTIFY
+"""
+import logging
+import select
+import threading
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+
+def notify(channel: str, payload: str) -> None:
+    """
+    Send a message to every listening worker, on every host
+
+    Delivered once the sending transaction commits (here immediately). The
+    sender receives its own messages too, so handlers must be idempotent.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": channel, "payload": payload}
+            )
+    except Exception as e:
+        logger.warning(f"Could not send {channel} notification: {e}")
+
+
+class NotificationListener:
+    """
+    Background thread receiving notifications for this worker
+
+    Holds one dedicated connection (detached from the pool) that LISTENs
+    on every subscribed channel and calls the channel's handler with each
+    payload. Messages sent while the connection was down are lost, so
+    after reconnecting each channel's `resync` callback runs instead.
+    Only PostgreSQL (psycopg2) supports this; elsewhere it does nothing.
+    """
+
+    POLL_SECONDS = 1.0
+    RETRY_SECONDS = 5.0
+
+    def __init__(self):
+        self._handlers: Dict[str, Callable[[str], None]] = {}
+        self._resyncs: Dict[str, Callable[[], None]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._listening = threading.Event()
+
+    def subscribe(
+        self,
+        channel: str,
+        handler: Callable[[str], None],
+        resync: Optional[Callable[[], None]] = None
+    ) -> None:
+        """Register a channel's handler (before `start`)"""
+        self._handlers[channel] = handler
+        if resync is not None:
+            self._resyncs[channel] = resync
+
+    def start(self) -> None:
+        """Start listening; waits (briefly) until the channels are LISTENed on"""
+        if self._thread is not None or engine.dialect.name != "postgresql":
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="notifications", daemon=True)
+        self._thread.start()
+        self._listening.wait(self.RETRY_SECONDS)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.POLL_SECONDS * 2)
+            self._thread = None
+
+    def _run(self) -> None:
+        connected_before = False
+        while not self._stopping.is_set():
+            try:
+                driver = self._connect()
+                self._listening.set()
+            except Exception as e:
+                logger.warning(f"Notification listener could not connect: {e}")
+                self._stopping.wait(self.RETRY_SECONDS)
+                continue
+
+            try:
+                if connected_before:
+                    for resync in self._resyncs.values():
+                        resync()
+                connected_before = True
+                self._listen(driver)
+            except Exception as e:
+                logger.warning(f"Notification listener lost its connection: {e}")
+                self._stopping.wait(self.RETRY_SECONDS)
+            finally:
+                driver.close()
+
+    def _connect(self):
+        connection = engine.raw_connection()
+        driver = connection.driver_connection
+        connection.detach()  # Held for the worker's lifetime, not a pool slot
+        driver.autocommit = True
+        with driver.cursor() as cursor:
+            for channel in self._handlers:
+                cursor.execute(f'LISTEN "{channel}"')
+        return driver
+
+    def _listen(self, driver) -> None:
+        while not self._stopping.is_set():
+            if select.select([driver], [], [], self.POLL_SECONDS) == ([], [], []):
+                continue
+            driver.poll()
+            while driver.notifies:
+                message = driver.notifies.pop(0)
+                handler = self._handlers.get(message.channel)
+                if handler is None:
+                    continue
+                try:
+                    handler(message.payload)
+                except Exception as e:
+                    logger.warning(f"Could not handle {message.channel} notification: {e}")
+
+
+# Singleton instance
+notification_listener = NotificationListener()
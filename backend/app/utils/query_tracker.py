@@ -0,0 +1,179 @@
+"""
+Smart Link Hub - Query Tracking Utility
+Per-request query counts, DB time and repeated statement (N+1) detection
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """
+    Queries run while tracking one request (or test block)
+
+    Statements are compared by their SQL text, which has bound parameters
+    as placeholders, so the same query for different rows has one shape.
+    A shape repeating more than `repeat_threshold` times is logged once as
+    a likely N+1 (a lazy load or a query in a loop).
+    """
+
+    __slots__ = ("label", "count", "seconds", "shapes", "repeat_threshold", "parent", "scope")
+
+    def __init__(
+        self,
+        label: str = "",
+        repeat_threshold: Optional[int] = None,
+        parent: Optional["QueryStats"] = None
+    ):
+        self.label = label
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Dict[str, int] = {}
+        self.repeat_threshold = (
+            settings.QUERY_REPEAT_WARN_THRESHOLD if repeat_threshold is None else repeat_threshold
+        )
+        self.parent = parent  # Enclosing tracker, which sees the same queries
+        self.scope: Optional[dict] = None  # ASGI scope of the tracked request
+
+    def record(self, statement: str, seconds: float, warn: bool = True) -> None:
+        self.count += 1
+        self.seconds += seconds
+        repeats = self.shapes[statement] = self.shapes.get(statement, 0) + 1
+        if warn and self.repeat_threshold and repeats == self.repeat_threshold + 1:
+            logger.warning(
+                f"Possible N+1 query in {self.route or 'request'}: statement ran more than "
+                f"{self.repeat_threshold} times: {_shorten(statement)}"
+            )
+        if self.parent is not None:
+            self.parent.record(statement, seconds, warn=False)
+
+    @property
+    def route(self) -> str:
+        """Request path with its path parameters named (GET /api/hubs/{hub_id}), else the label"""
+        if not self.scope or "path_params" not in self.scope:
+            return self.label
+        names = {str(value): f"{{{name}}}" for name, value in self.scope["path_params"].items()}
+        path = "/".join(names.get(segment, segment) for segment in self.scope["path"].split("/"))
+        return f"{self.scope['method']} {path}"
+
+    @property
+    def repeated(self) -> Dict[str, int]:
+        """Statements that ran more than `repeat_threshold` times"""
+        return {
+            statement: repeats for statement, repeats in self.shapes.items()
+            if self.repeat_threshold and repeats > self.repeat_threshold
+        }
+
+
+def _shorten(statement: str, limit: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    """Tracker of the current request, if any"""
+    return _current.get()
+
+
+@contextmanager
+def track_queries(label: str = "", repeat_threshold: Optional[int] = None) -> Iterator[QueryStats]:
+    """
+    Count the queries run in this context (and threads started from it)
+
+    Trackers nest: queries count towards every enclosing tracker, so a
+    test can wrap requests that the middleware also tracks. Only the
+    innermost tracker logs repeated statements; check `repeated` instead.
+
+    Usage:
+        with track_queries() as stats:
+            client.get("/api/hubs")
+        assert stats.count <= 3 and not stats.repeated
+    """
+    stats = QueryStats(label, repeat_threshold, _current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started_at = time.perf_counter()
+
+
+def time_statements(engine: Engine) -> None:
+    """
+    Time the engine's statements (once, however many hooks ask)
+
+    The start time is kept on the statement's execution context, which is
+    discarded with the statement, so one that raises leaves nothing behind.
+    """
+    if not event.contains(engine, "before_cursor_execute", _start_timer):
+        event.listen(engine, "before_cursor_execute", _start_timer)
+
+
+def statement_seconds(context) -> Optional[float]:
+    """Run time of a statement timed by `time_statements` (in after_cursor_execute)"""
+    started = getattr(context, "_query_started_at", None)
+    return None if started is None else time.perf_counter() - started
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Report the engine's queries to the tracked request, if any"""
+    time_statements(engine)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _current.get()
+        if stats is None:
+            return
+        seconds = statement_seconds(context)
+        if seconds is not None:
+            stats.record(statement, seconds)
+
+
+class QueryTrackingMiddleware:
+    """
+    Pure ASGI middleware tracking the queries of each HTTP request
+
+    With `headers` set (debug mode), responses carry X-DB-Query-Count and
+    X-DB-Time-Ms. Queries run after the response has started (streamed
+    exports) are tracked, but not in the headers.
+    """
+
+    def __init__(self, app, headers: bool = False):
+        self.app = app
+        self.headers = headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries(f"{scope['method']} {scope['path']}") as stats:
+            stats.scope = scope  # The router adds the path parameters to it
+            if not self.headers:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", ())) + [
+                        (b"x-db-query-count", str(stats.count).encode()),
+                        (b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode()),
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
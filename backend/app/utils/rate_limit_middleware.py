@@ -0,0 +1,129 @@
+"""
+Smart Link Hub - Rate Limit Middleware
+Per-path-prefix rate limiting applied before routing
+"""
+import ipaddress
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.rate_limiter import Limiter, check_rate_limit_async
+
+logger = logging.getLogger(__name__)
+
+metrics.counter("rate_limit_rejected_total", "Requests rejected by the rate limit middleware")
+
+
+_trusted_proxies = settings.trusted_proxies_list
+_warned_untrusted_proxy = False
+
+
+def _is_trusted_proxy(ip: str) -> bool:
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_proxies)
+
+
+def _warn_if_untrusted_proxy(peer: str, scope: dict) -> None:
+    """Warn once when a private peer (likely a proxy) forwards client IPs we ignore"""
+    global _warned_untrusted_proxy
+    if not any(name == b"x-forwarded-for" for name, _ in scope.get("headers", ())):
+        return
+    try:
+        private = ipaddress.ip_address(peer).is_private
+    except ValueError:
+        return
+    if private:
+        _warned_untrusted_proxy = True
+        logger.warning(
+            f"Ignoring X-Forwarded-For from {peer}, which is not in TRUSTED_PROXIES: all clients "
+            f"behind it share one IP for rate limits, visit dedup and geo lookups"
+        )
+
+
+def get_scope_client_ip(scope: dict) -> str:
+    """
+    Client IP of an ASGI scope
+
+    X-Forwarded-For and X-Real-IP can be set by anyone, so they are only
+    believed when the peer is one of TRUSTED_PROXIES. X-Forwarded-For is
+    then read from the right, skipping trusted proxies, so the result is
+    the address the outermost trusted proxy saw, not one the client made up.
+    """
+    client = scope.get("client")
+    peer = client[0] if client else None
+    if peer is None or not _is_trusted_proxy(peer):
+        if peer is not None and not _warned_untrusted_proxy:
+            _warn_if_untrusted_proxy(peer, scope)
+        return peer or "unknown"
+
+    forwarded = []
+    real_ip = None
+    for name, value in scope.get("headers", ()):
+        if name == b"x-forwarded-for":
+            forwarded.extend(hop.strip() for hop in value.decode("latin-1").split(","))
+        elif name == b"x-real-ip" and real_ip is None:
+            real_ip = value.decode("latin-1").strip()
+
+    for hop in reversed(forwarded):
+        if hop and not _is_trusted_proxy(hop):
+            return hop
+    return real_ip or peer
+
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI rate limiting by path prefix
+
+    Runs before routing, so a rejected request never has its parameters or
+    body parsed and never checks out a DB connection; a 429 costs one
+    limiter check and a small JSON response. Checks against Redis wait in
+    a thread pool, never on the event loop. The longest matching prefix
+    picks the limiter; paths matching no prefix (health, docs) and CORS
+    preflights are not limited.
+    """
+
+    def __init__(self, app, policies: Dict[str, Limiter]):
+        self.app = app
+        # Longest prefix first
+        self.policies: List[Tuple[str, Limiter]] = sorted(
+            policies.items(), key=lambda policy: len(policy[0]), reverse=True
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] != "OPTIONS":
+            match = self._match(scope["path"])
+            if match is not None:
+                prefix, limiter = match
+                allowed, retry_after = await check_rate_limit_async(get_scope_client_ip(scope), limiter)
+                if not allowed:
+                    metrics.inc("rate_limit_rejected_total", policy=prefix)
+                    await _reject(send, retry_after)
+                    return
+        await self.app(scope, receive, send)
+
+    def _match(self, path: str) -> Optional[Tuple[str, Limiter]]:
+        for prefix, limiter in self.policies:
+            if path.startswith(prefix) and (
+                len(path) == len(prefix) or prefix.endswith("/") or path[len(prefix)] == "/"
+            ):
+                return prefix, limiter
+        return None
+
+
+async def _reject(send, retry_after: int) -> None:
+    body = json.dumps({"detail": f"Rate limit exceeded. Retry after {retry_after} seconds"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,13 +1,34 @@
 """
 Smart Link Hub - Rate Limiting Utility
-Token bucket rate limiter for API protection
+Token bucket and GCRA rate limiters for API protection, in process or shared
 """
 import time
-from collections import defaultdict
-from typing import Tuple, Dict
+from array import array
 from threading import Lock
+from typing import Dict, List, Optional, Tuple, Union
 
 from app.config import settings
+from app.utils.shared_state import get_shared_state, run_shared
+
+
+class _Bucket:
+    """Token bucket state of one key"""
+    
+    __slots__ = ("tokens", "last_update")
+    
+    def __init__(self, tokens: float, last_update: float):
+        self.tokens = tokens
+        self.last_update = last_update
+
+
+class _Stripe:
+    """One shard of the key space with its own lock"""
+    
+    __slots__ = ("buckets", "lock")
+    
+    def __init__(self):
+        self.buckets: Dict[str, _Bucket] = {}
+        self.lock = Lock()
 
 
 class RateLimiter:
@@ -16,18 +37,24 @@ class RateLimiter:
     
     Each key (e.g., IP address) gets a bucket of tokens.
     Tokens are consumed on each request and refilled over time.
+    
+    Keys are spread over `stripes` independently locked shards, so
+    concurrent requests only contend when their keys hash to the same
+    stripe. `cleanup` is run periodically from the application lifespan.
     """
     
     def __init__(
         self,
         requests_per_minute: int = 60,
-        burst_size: int = 10
+        burst_size: int = 10,
+        stripes: int = 16
     ):
         self.rate = requests_per_minute / 60.0  # tokens per second
         self.burst_size = burst_size
-        self.tokens: Dict[str, float] = defaultdict(lambda: float(burst_size))
-        self.last_update: Dict[str, float] = defaultdict(time.time)
-        self._lock = Lock()
+        self._stripes: List[_Stripe] = [_Stripe() for _ in range(max(1, stripes))]
+    
+    def __len__(self) -> int:
+        return sum(len(stripe.buckets) for stripe in self._stripes)
     
     def is_allowed(self, key: str) -> Tuple[bool, int]:
         """
@@ -39,51 +66,312 @@ class RateLimiter:
         Returns:
             Tuple of (allowed: bool, retry_after_seconds: int)
         """
-        with self._lock:
-            now = time.time()
+        stripe = self._stripes[hash(key) % len(self._stripes)]
+        with stripe.lock:
+            now = time.monotonic()
+            bucket = stripe.buckets.get(key)
+            if bucket is None:
+                bucket = stripe.buckets[key] = _Bucket(float(self.burst_size), now)
+            else:
+                # Refill tokens based on time elapsed
+                bucket.tokens = min(
+                    self.burst_size,
+                    bucket.tokens + (now - bucket.last_update) * self.rate
+                )
+                bucket.last_update = now
             
-            # Refill tokens based on time elapsed
-            elapsed = now - self.last_update[key]
-            self.tokens[key] = min(
-                self.burst_size,
-                self.tokens[key] + elapsed * self.rate
-            )
-            self.last_update[key] = now
-            
-            if self.tokens[key] >= 1:
-                self.tokens[key] -= 1
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
                 return True, 0
             
             # Calculate retry-after
-            retry_after = int((1 - self.tokens[key]) / self.rate) + 1
+            retry_after = int((1 - bucket.tokens) / self.rate) + 1
+            return False, retry_after
+    
+    def cleanup(self, max_age_seconds: Optional[float] = None) -> int:
+        """
+        Remove stale entries to prevent memory growth
+        
+        By default a key is stale once its bucket would have refilled
+        completely, since it then behaves exactly like a new key.
+        
+        Returns:
+            Number of removed keys
+        """
+        if max_age_seconds is None:
+            max_age_seconds = self.burst_size / self.rate if self.rate > 0 else 600
+        removed = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                cutoff = time.monotonic() - max_age_seconds
+                stale_keys = [
+                    key for key, bucket in stripe.buckets.items()
+                    if bucket.last_update < cutoff
+                ]
+                for key in stale_keys:
+                    del stripe.buckets[key]
+            removed += len(stale_keys)
+        return removed
+
+
+class _TATTable:
+    """
+    Open-addressing hash table of key hash -> theoretical arrival time
+    
+    Two parallel arrays (int64 hashes, float64 TATs) with linear probing;
+    a hash of 0 marks an empty slot. Raw keys are never stored. The arrays
+    and mask are swapped as one tuple so lock-free readers always see a
+    consistent table.
+    """
+    
+    __slots__ = ("state", "used", "lock")
+    
+    MIN_SIZE = 64
+    
+    def __init__(self, size: int = MIN_SIZE):
+        self.state = (array("q", bytes(8 * size)), array("d", bytes(8 * size)), size - 1)
+        self.used = 0  # Non-empty slots, including expired ones
+        self.lock = Lock()
+    
+    def live(self, now: float) -> int:
+        hashes, tats, _ = self.state
+        return sum(1 for h, tat in zip(hashes, tats) if h != 0 and tat > now)
+    
+    def claim(self, h: int, now: float) -> Tuple[array, int]:
+        """
+        Find the slot of hash `h`, claiming one if it has none
+        
+        New keys take the first empty or expired slot on their probe path;
+        a claimed slot's TAT is in the past, i.e. the key starts fresh.
+        Must be called with the lock held.
+        
+        Returns:
+            Tuple of (TAT array, slot index)
+        """
+        hashes, tats, mask = self.state
+        if (self.used + 1) * 2 > mask + 1:
+            self.rebuild(now)
+            hashes, tats, mask = self.state
+        
+        index = h & mask
+        free = -1
+        while True:
+            slot_hash = hashes[index]
+            if slot_hash == h:
+                return tats, index
+            if slot_hash == 0:
+                break
+            if free < 0 and tats[index] <= now:
+                free = index  # Expired, reusable
+            index = (index + 1) & mask
+        
+        if free < 0:
+            free = index
+            self.used += 1
+        tats[free] = now
+        hashes[free] = h
+        return tats, free
+    
+    def rebuild(self, now: float) -> int:
+        """
+        Drop expired entries and resize to the live ones (lock held)
+        
+        Returns:
+            Number of dropped entries
+        """
+        old_hashes, old_tats, _ = self.state
+        live = [
+            (h, tat) for h, tat in zip(old_hashes, old_tats)
+            if h != 0 and tat > now
+        ]
+        size = self.MIN_SIZE
+        while size < len(live) * 4:
+            size *= 2
+        
+        hashes = array("q", bytes(8 * size))
+        tats = array("d", bytes(8 * size))
+        mask = size - 1
+        for h, tat in live:
+            index = h & mask
+            while hashes[index] != 0:
+                index = (index + 1) & mask
+            hashes[index] = h
+            tats[index] = tat
+        
+        dropped = self.used - len(live)
+        self.state, self.used = (hashes, tats, mask), len(live)
+        return dropped
+
+
+class GCRALimiter:
+    """
+    Generic Cell Rate Algorithm rate limiter
+    
+    Equivalent to a token bucket of `burst_size` tokens, but each key only
+    needs its theoretical arrival time (TAT): the time at which its bucket
+    would be full again. A request is allowed if, after adding one emission
+    interval, the TAT is at most `burst_size` intervals ahead of now.
+    
+    TATs live in compact striped hash tables keyed by `hash(key)`, 16 bytes
+    per slot at a load factor of 1/4 to 1/2. A key whose TAT has passed
+    behaves exactly like an unknown key, so expired slots are reused in
+    place and dropped whenever a table is rebuilt; `cleanup` shrinks the
+    tables.
+    
+    Checks of known keys don't take the stripe lock: the update is a single
+    float store, and two simultaneous checks of the same key can at worst
+    count as one. Inserting keys and rebuilding tables are locked.
+    """
+    
+    def __init__(
+        self,
+        requests_per_minute: int = 60,
+        burst_size: int = 10,
+        stripes: int = 16
+    ):
+        self.rate = requests_per_minute / 60.0  # requests per second
+        self.burst_size = burst_size
+        self.interval = 1 / self.rate  # Emission interval
+        self.tolerance = burst_size * self.interval
+        self._stripe_count = max(1, stripes)
+        self._stripes: List[_TATTable] = [_TATTable() for _ in range(self._stripe_count)]
+    
+    def __len__(self) -> int:
+        now = time.monotonic()
+        return sum(table.live(now) for table in self._stripes)
+    
+    def is_allowed(self, key: str) -> Tuple[bool, int]:
+        """
+        Check if request is allowed for given key
+        
+        Args:
+            key: Identifier (usually IP address or user ID)
+            
+        Returns:
+            Tuple of (allowed: bool, retry_after_seconds: int)
+        """
+        h = hash(key)
+        table = self._stripes[h % self._stripe_count]
+        # Low bits picked the stripe; probe with the rest (0 marks empty slots)
+        h = h // self._stripe_count or 1
+        now = time.monotonic()
+        
+        hashes, tats, mask = table.state
+        index = h & mask
+        if hashes[index] != h:
+            with table.lock:
+                tats, index = table.claim(h, now)
+        
+        tat = tats[index]
+        new_tat = (tat if tat > now else now) + self.interval
+        if new_tat - now > self.tolerance:
+            retry_after = int(new_tat - now - self.tolerance) + 1
             return False, retry_after
+        
+        tats[index] = new_tat
+        return True, 0
+    
+    def cleanup(self, max_age_seconds: Optional[float] = None) -> int:
+        """
+        Drop expired keys and shrink the tables
+        
+        `max_age_seconds` is accepted for compatibility with RateLimiter;
+        GCRA state expires on its own.
+        
+        Returns:
+            Number of removed keys
+        """
+        removed = 0
+        for table in self._stripes:
+            with table.lock:
+                removed += table.rebuild(time.monotonic())
+        return removed
+
+
+class SharedLimiter:
+    """
+    GCRA rate limiter whose state lives in the shared state backend
+    
+    Limits hold across all workers (see `app.utils.shared_state`), so a
+    client gets the configured rate regardless of how many workers serve
+    it. Keys are namespaced by `name` so limiters don't share budgets.
+    """
+    
+    def __init__(self, name: str, requests_per_minute: int = 60, burst_size: int = 10):
+        self.name = name
+        self.rate = requests_per_minute / 60.0  # requests per second
+        self.burst_size = burst_size
+        self.interval = 1 / self.rate
+        self.tolerance = burst_size * self.interval
+    
+    def is_allowed(self, key: str) -> Tuple[bool, int]:
+        """
+        Check if request is allowed for given key
+        
+        Returns:
+            Tuple of (allowed: bool, retry_after_seconds: int)
+        """
+        return get_shared_state().rate_limit(f"{self.name}:{key}", self.interval, self.tolerance)
     
-    def cleanup(self, max_age_seconds: int = 600):
-        """Remove stale entries to prevent memory growth"""
-        with self._lock:
-            now = time.time()
-            stale_keys = [
-                key for key, last in self.last_update.items()
-                if now - last > max_age_seconds
-            ]
-            for key in stale_keys:
-                del self.tokens[key]
-                del self.last_update[key]
+    def cleanup(self, max_age_seconds: Optional[float] = None) -> int:
+        """Shared state expires on its own (see `SharedState.cleanup`)"""
+        return 0
+
+
+Limiter = Union[RateLimiter, GCRALimiter, SharedLimiter]
+
+ALGORITHMS = {
+    "token_bucket": RateLimiter,
+    "gcra": GCRALimiter,
+}
+
+
+def create_rate_limiter(
+    name: str,
+    algorithm: str,
+    requests_per_minute: int,
+    burst_size: int
+) -> Limiter:
+    """
+    Create a limiter for the `RATE_LIMIT_BACKEND` and `*_RATE_LIMIT_ALGORITHM` settings
+    
+    Shared backends always use GCRA, which needs a single value per key.
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+    if settings.RATE_LIMIT_BACKEND != "memory":
+        return SharedLimiter(name, requests_per_minute, burst_size)
+    return ALGORITHMS[algorithm](
+        requests_per_minute=requests_per_minute,
+        burst_size=burst_size,
+        stripes=settings.RATE_LIMIT_STRIPES
+    )
 
 
 # Rate limiter instances
-api_rate_limiter = RateLimiter(
+api_rate_limiter = create_rate_limiter(
+    "api",
+    settings.RATE_LIMIT_ALGORITHM,
     requests_per_minute=settings.RATE_LIMIT_PER_MINUTE,
     burst_size=20
 )
 
-public_rate_limiter = RateLimiter(
+public_rate_limiter = create_rate_limiter(
+    "public",
+    settings.PUBLIC_RATE_LIMIT_ALGORITHM,
     requests_per_minute=settings.PUBLIC_RATE_LIMIT_PER_MINUTE,
     burst_size=50
 )
 
 
-def check_rate_limit(key: str, limiter: RateLimiter = api_rate_limiter) -> Tuple[bool, int]:
+def cleanup_rate_limiters() -> None:
+    """Evict stale keys from all limiters and the shared state (periodic job)"""
+    for limiter in (api_rate_limiter, public_rate_limiter):
+        limiter.cleanup()
+    get_shared_state().cleanup()
+
+
+def check_rate_limit(key: str, limiter: Limiter = api_rate_limiter) -> Tuple[bool, int]:
     """
     Check if a request is within rate limits
     
@@ -91,3 +379,10 @@ def check_rate_limit(key: str, limiter: RateLimiter = api_rate_limiter) -> Tuple
         Tuple of (allowed, retry_after_seconds)
     """
     return limiter.is_allowed(key)
+
+
+async def check_rate_limit_async(key: str, limiter: Limiter = api_rate_limiter) -> Tuple[bool, int]:
+    """`check_rate_limit` for the event loop (shared checks via `run_shared`)"""
+    if isinstance(limiter, SharedLimiter):
+        return await run_shared(limiter.is_allowed, key)
+    return limiter.is_allowed(key)
@@ -0,0 +1,341 @@
+"""
+Smart Link Hub - Shared State Utility
+Rate limit and dedup state shared by all workers (memory, Redis or mmap)
+"""
+import asyncio
+import fcntl
+import hashlib
+import logging
+import math
+import mmap
+import os
+import time
+from abc import ABC, abstractmethod
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from app.config import settings
+from app.utils.executors import get_thread_pool
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState(ABC):
+    """
+    Interface of a rate limit / dedup store
+
+    `rate_limit` is a GCRA check: each key holds one theoretical arrival
+    time (TAT), see `GCRALimiter`. `first_seen` atomically claims a key for
+    `ttl_seconds` and reports whether it was free, which is what visit
+    dedup needs across workers. `blocking` stores wait on the network, so
+    async code must not call them on the event loop.
+    """
+
+    blocking = False
+
+    @abstractmethod
+    def rate_limit(self, key: str, interval: float, tolerance: float) -> Tuple[bool, int]:
+        """Returns (allowed, retry_after_seconds)"""
+
+    @abstractmethod
+    def first_seen(self, key: str, ttl_seconds: float) -> bool:
+        """True if `key` wasn't claimed in the last `ttl_seconds` (and claim it)"""
+
+    def cleanup(self) -> None:
+        """Drop expired state (periodic job)"""
+
+
+def _gcra(tat: float, now: float, interval: float, tolerance: float) -> Tuple[Optional[float], int]:
+    """Returns (new TAT or None if rejected, retry_after_seconds)"""
+    new_tat = (tat if tat > now else now) + interval
+    wait = new_tat - now - tolerance
+    if wait > 0:
+        return None, int(wait) + 1
+    return new_tat, 0
+
+
+class MemorySharedState(SharedState):
+    """Per-process state; limits and dedup only hold within one worker"""
+
+    def __init__(self):
+        self._values: Dict[str, float] = {}  # key -> TAT / claim expiry
+        self._lock = Lock()
+
+    def rate_limit(self, key: str, interval: float, tolerance: float) -> Tuple[bool, int]:
+        with self._lock:
+            now = time.monotonic()
+            new_tat, retry_after = _gcra(self._values.get(key, now), now, interval, tolerance)
+            if new_tat is not None:
+                self._values[key] = new_tat
+        return new_tat is not None, retry_after
+
+    def first_seen(self, key: str, ttl_seconds: float) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self._values.get(key, 0) > now:
+                return False
+            self._values[key] = now + ttl_seconds
+            return True
+
+    def cleanup(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._values = {k: v for k, v in self._values.items() if v > now}
+
+
+# KEYS[1] = key; ARGV = interval ms, tolerance ms. Returns {allowed, retry_after_ms}.
+# Uses the server clock so all workers agree on "now" (Redis >= 5).
+_GCRA_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval
+local wait = new_tat - now - tolerance
+if wait > 0 then
+    return {0, wait}
+end
+redis.call('SET', KEYS[1], new_tat, 'PX', new_tat - now)
+return {1, 0}
+"""
+
+
+class RedisSharedState(SharedState):
+    """
+    State in Redis (or any server speaking its protocol, e.g. Valkey)
+
+    Each GCRA check is one atomic Lua script call (EVALSHA); dedup is a
+    plain SET NX PX.
+    Keys expire on their own, so no cleanup is needed. If Redis is
+    unreachable, checks fail open (requests are allowed) and a warning is
+    logged, since a rate limiter shouldn't take the site down with it.
+    """
+
+    PREFIX = "slh:"
+    blocking = True
+
+    def __init__(self, url: str, timeout: float = 0.25):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError(
+                "RATE_LIMIT_BACKEND=redis requires the 'redis' package (pip install redis)"
+            ) from None
+
+        self._errors = redis.RedisError
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+            health_check_interval=30
+        )
+        self._gcra = self._client.register_script(_GCRA_SCRIPT)
+        self._failing = False
+
+    def rate_limit(self, key: str, interval: float, tolerance: float) -> Tuple[bool, int]:
+        try:
+            allowed, wait_ms = self._gcra(
+                keys=[f"{self.PREFIX}rl:{key}"],
+                args=[max(1, round(interval * 1000)), round(tolerance * 1000)]
+            )
+        except self._errors as e:
+            self._failed(e)
+            return True, 0
+
+        self._recovered()
+        return bool(allowed), 0 if allowed else math.ceil(int(wait_ms) / 1000)
+
+    def first_seen(self, key: str, ttl_seconds: float) -> bool:
+        try:
+            claimed = self._client.set(
+                f"{self.PREFIX}seen:{key}", 1, nx=True, px=max(1, round(ttl_seconds * 1000))
+            )
+        except self._errors as e:
+            self._failed(e)
+            return True
+        self._recovered()
+        return bool(claimed)
+
+    def _failed(self, error: Exception) -> None:
+        if not self._failing:
+            self._failing = True
+            logger.warning(f"Redis shared state unavailable, failing open: {error}")
+
+    def _recovered(self) -> None:
+        if self._failing:
+            self._failing = False
+            logger.info("Redis shared state recovered")
+
+
+class MmapSharedState(SharedState):
+    """
+    State in a memory-mapped file shared by all workers on one host
+
+    The file is a fixed-size open-addressing table: an int64 key hash array
+    followed by a float64 value array (TAT or claim expiry, wall clock). It
+    is split into stripes guarded by an fcntl byte-range lock (between
+    processes) plus a thread lock (within one). Expired slots are reused in
+    place; when a probe sequence is full of live keys, the one closest to
+    expiring is evicted, so a full table forgets clients instead of
+    failing. Key hashes are BLAKE2b, which unlike `hash()` is the same in
+    every worker.
+    """
+
+    STRIPE_SLOTS = 4096
+    MAX_PROBES = 32
+
+    def __init__(self, path: str, slots: int):
+        stripes = max(1, slots // self.STRIPE_SLOTS)
+        self.slots = stripes * self.STRIPE_SLOTS
+        size = self.slots * 16
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size != size:
+                # New file or a different RATE_LIMIT_MMAP_SLOTS: start empty
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+        self._mmap = mmap.mmap(self._fd, size)
+        view = memoryview(self._mmap)
+        self._hashes = view[:self.slots * 8].cast("q")
+        self._values = view[self.slots * 8:].cast("d")
+        stripe_bytes = self.STRIPE_SLOTS * 8
+        self._locks = [
+            _StripeLock(self._fd, stripe * stripe_bytes, stripe_bytes) for stripe in range(stripes)
+        ]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        h = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little", signed=True)
+        return h or 1  # 0 marks empty slots
+
+    def _stripe(self, h: int) -> int:
+        return (h >> 32) % len(self._locks)
+
+    def _slot(self, stripe: int, h: int, now: float) -> int:
+        """Index of `h`'s slot, claiming one (value 0.0 = expired) if missing; lock held"""
+        hashes, values = self._hashes, self._values
+        base = stripe * self.STRIPE_SLOTS
+        mask = self.STRIPE_SLOTS - 1
+        free = victim = -1
+        for probe in range(self.MAX_PROBES):
+            index = base + ((h + probe) & mask)
+            slot_hash = hashes[index]
+            if slot_hash == h:
+                return index
+            if slot_hash == 0:
+                if free < 0:
+                    free = index
+                break  # Slots never become empty again, so the key isn't further on
+            if free < 0 and values[index] <= now:
+                free = index
+            elif victim < 0 or values[index] < values[victim]:
+                victim = index
+
+        index = free if free >= 0 else victim
+        values[index] = 0.0
+        hashes[index] = h
+        return index
+
+    def rate_limit(self, key: str, interval: float, tolerance: float) -> Tuple[bool, int]:
+        h = self._hash(f"rl:{key}")
+        stripe = self._stripe(h)
+        with self._locks[stripe]:
+            now = time.time()
+            index = self._slot(stripe, h, now)
+            new_tat, retry_after = _gcra(self._values[index], now, interval, tolerance)
+            if new_tat is not None:
+                self._values[index] = new_tat
+        return new_tat is not None, retry_after
+
+    def first_seen(self, key: str, ttl_seconds: float) -> bool:
+        h = self._hash(f"seen:{key}")
+        stripe = self._stripe(h)
+        with self._locks[stripe]:
+            now = time.time()
+            index = self._slot(stripe, h, now)
+            if self._values[index] > now:
+                return False
+            self._values[index] = now + ttl_seconds
+            return True
+
+
+class _StripeLock:
+    """
+    Thread lock + fcntl lock on one stripe's byte range
+
+    fcntl locks are held per process, so threads of one worker also need
+    the thread lock to exclude each other.
+    """
+
+    __slots__ = ("fd", "lock", "start", "length")
+
+    def __init__(self, fd: int, start: int, length: int):
+        self.fd, self.lock, self.start, self.length = fd, Lock(), start, length
+
+    def __enter__(self):
+        self.lock.acquire()
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX, self.length, self.start)
+        except BaseException:
+            self.lock.release()
+            raise
+
+    def __exit__(self, *exc):
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, self.length, self.start)
+        finally:
+            self.lock.release()
+
+
+_shared_state: Optional[SharedState] = None
+_shared_state_lock = Lock()
+
+
+def create_shared_state(backend: str) -> SharedState:
+    """Create the store for a RATE_LIMIT_BACKEND setting"""
+    if backend == "memory":
+        return MemorySharedState()
+    if backend == "redis":
+        if not settings.REDIS_URL:
+            raise ValueError("RATE_LIMIT_BACKEND=redis requires REDIS_URL")
+        return RedisSharedState(settings.REDIS_URL)
+    if backend == "mmap":
+        return MmapSharedState(settings.RATE_LIMIT_MMAP_PATH, settings.RATE_LIMIT_MMAP_SLOTS)
+    raise ValueError(f"Unknown rate limit backend: {backend}")
+
+
+T = TypeVar("T")
+
+
+async def run_shared(call: Callable[..., T], *args: Any) -> T:
+    """
+    Call the shared store from the event loop
+
+    Calls to a blocking store (Redis) run in a thread pool so the loop keeps
+    serving other requests while they wait; in-process and mmap calls are
+    quick and run inline.
+    """
+    if get_shared_state().blocking:
+        pool = get_thread_pool("rate-limit", settings.RATE_LIMIT_THREADS)
+        return await asyncio.get_running_loop().run_in_executor(pool, call, *args)
+    return call(*args)
+
+
+def get_shared_state() -> SharedState:
+    """The process-wide store, created on first use (after worker start)"""
+    global _shared_state
+    if _shared_state is None:
+        with _shared_state_lock:
+            if _shared_state is None:
+                _shared_state = create_shared_state(settings.RATE_LIMIT_BACKEND)
+    return _shared_state
@@ -0,0 +1,102 @@
+"""
+Smart Link Hub - Short Code Utility
+Keyed bijection from sequence numbers to fixed-length base62 short codes
+"""
+import hashlib
+import string
+
+from app.config import settings
+
+ALPHABET = string.digits + string.ascii_letters
+CODE_LENGTH = 7
+CODE_SPACE = len(ALPHABET) ** CODE_LENGTH  # 62^7 ~ 3.5 trillion codes
+
+_HALF_BITS = 21  # 2^42 is the smallest even power of two >= 62^7
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 4
+
+
+class ShortCodeCipher:
+    """
+    Format-preserving permutation of [0, 62^7)
+
+    A balanced Feistel network over 42-bit integers is a bijection for any
+    round function; cycle-walking (re-encrypting until the value falls
+    inside the code space) restricts it to a bijection of the code space.
+    Distinct sequence numbers therefore always give distinct codes, while
+    consecutive numbers look unrelated without the key.
+    """
+
+    def __init__(self, key: bytes):
+        self._round_keys = [
+            hashlib.blake2b(key, digest_size=16, person=b"short-code-%d" % i).digest()
+            for i in range(_ROUNDS)
+        ]
+
+    def _round(self, i: int, value: int) -> int:
+        digest = hashlib.blake2b(
+            value.to_bytes(3, "big"), digest_size=8, key=self._round_keys[i]
+        ).digest()
+        return int.from_bytes(digest, "big") & _HALF_MASK
+
+    def _encrypt_block(self, value: int) -> int:
+        left, right = value >> _HALF_BITS, value & _HALF_MASK
+        for i in range(_ROUNDS):
+            left, right = right, left ^ self._round(i, right)
+        return (left << _HALF_BITS) | right
+
+    def _decrypt_block(self, value: int) -> int:
+        left, right = value >> _HALF_BITS, value & _HALF_MASK
+        for i in reversed(range(_ROUNDS)):
+            left, right = right ^ self._round(i, left), left
+        return (left << _HALF_BITS) | right
+
+    def encrypt(self, number: int) -> int:
+        """Map a number in [0, 62^7) to another number in the same range"""
+        if not 0 <= number < CODE_SPACE:
+            raise ValueError("Number outside the short code space")
+        value = self._encrypt_block(number)
+        while value >= CODE_SPACE:
+            value = self._encrypt_block(value)
+        return value
+
+    def decrypt(self, value: int) -> int:
+        """Inverse of `encrypt`"""
+        if not 0 <= value < CODE_SPACE:
+            raise ValueError("Value outside the short code space")
+        number = self._decrypt_block(value)
+        while number >= CODE_SPACE:
+            number = self._decrypt_block(number)
+        return number
+
+    def encode(self, number: int) -> str:
+        """Short code for a sequence number"""
+        return to_base62(self.encrypt(number))
+
+    def decode(self, code: str) -> int:
+        """Sequence number of a short code"""
+        return self.decrypt(from_base62(code))
+
+
+def to_base62(value: int, length: int = CODE_LENGTH) -> str:
+    """Encode a number as a zero-padded base62 string"""
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 62)
+        chars.append(ALPHABET[digit])
+    if value:
+        raise ValueError("Value too large for the code length")
+    return "".join(reversed(chars))
+
+
+def from_base62(code: str) -> int:
+    """Decode a base62 string"""
+    value = 0
+    for char in code:
+        value = value * 62 + ALPHABET.index(char)
+    return value
+
+
+short_code_cipher = ShortCodeCipher(
+    hashlib.sha256(b"short-codes:" + settings.SECRET_KEY.encode()).digest()
+)
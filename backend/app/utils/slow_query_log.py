@@ -0,0 +1,199 @@
+"""
+Smart Link Hub - Slow Query Log
+Sampled log of slow statements with their query plans
+"""
+import json
+import logging
+import os
+import random
+from collections import deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+from app.utils.executors import get_thread_pool
+from app.utils.metrics import metrics
+from app.utils.query_tracker import current_stats, statement_seconds, time_statements
+
+logger = logging.getLogger(__name__)
+
+metrics.counter("slow_queries_total", "Statements slower than SLOW_QUERY_MS")
+
+# Statements EXPLAIN accepts (without ANALYZE they are planned, not run)
+EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+
+def parameter_shape(parameters: Any) -> Any:
+    """Types of bound parameters, without their values"""
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class SlowQueryLog:
+    """
+    Records statements slower than a threshold
+
+    Every statement is timed by engine events; a sample of the slow ones
+    is recorded with the route that ran it, the shape of its bound
+    parameters (types only, so no user data is logged) and its plan. The
+    plan comes from `EXPLAIN (ANALYZE false)` on the same engine, run by a
+    single background thread so requests never wait for it; when too many
+    plans are pending the entry is recorded without one.
+
+    Entries are appended as JSON lines to a rotating log file and kept in
+    memory (per worker) for the admin API. Each worker process writes its
+    own file (the PID is added to `path`), since rotating one file from
+    several processes loses entries.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: int,
+        sample_rate: float,
+        path: str,
+        max_bytes: int,
+        backup_count: int,
+        max_pending: int = 8,
+        keep_recent: int = 200
+    ):
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.max_pending = max_pending
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=keep_recent)
+        self._pending = 0
+        self._file_logger: Optional[logging.Logger] = None
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def instrument(self, engine: Engine, pool: str) -> None:
+        """Time the engine's statements (no-op when disabled)"""
+        if not self.enabled:
+            return
+
+        time_statements(engine)
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = statement_seconds(context)
+            if elapsed is None:
+                return
+            if elapsed >= self.threshold and not statement.startswith("EXPLAIN"):
+                self._slow(engine, pool, statement, parameters, executemany, elapsed)
+
+    def _slow(
+        self,
+        engine: Engine,
+        pool: str,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        elapsed: float
+    ) -> None:
+        metrics.inc("slow_queries_total", pool=pool)
+        if random.random() >= self.sample_rate:
+            return
+
+        stats = current_stats()
+        entry = {
+            "time": datetime.now(timezone.utc).isoformat(),
+            "pool": pool,
+            "duration_ms": round(elapsed * 1000, 1),
+            "route": stats.route if stats is not None else "background",
+            "statement": statement,
+            "parameters": (
+                {"rows": len(parameters), "shape": parameter_shape(parameters[0]) if parameters else None}
+                if executemany else parameter_shape(parameters)
+            ),
+            "plan": None
+        }
+
+        explainable = (
+            not executemany
+            and engine.dialect.name == "postgresql"
+            and statement.lstrip()[:6].lower().startswith(EXPLAINABLE)
+        )
+        if explainable:
+            with self._lock:
+                explainable = self._pending < self.max_pending
+                if explainable:
+                    self._pending += 1
+        if explainable:
+            get_thread_pool("slow-query-explain", 1).submit(
+                self._explain, engine, entry, statement, parameters
+            )
+        else:
+            self._write(entry)
+
+    def _explain(self, engine: Engine, entry: Dict[str, Any], statement: str, parameters: Any) -> None:
+        """Capture the plan (background thread), then record the entry"""
+        try:
+            with engine.connect() as conn:
+                rows = conn.exec_driver_sql(f"EXPLAIN (ANALYZE false) {statement}", parameters)
+                entry["plan"] = "\n".join(row[0] for row in rows)
+                conn.rollback()
+        except Exception as e:
+            entry["plan_error"] = str(e)
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._write(entry)
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._recent.append(entry)
+        try:
+            self._file().info(json.dumps(entry, default=str))
+        except OSError as e:
+            logger.warning(f"Could not write slow query log: {e}")
+
+    def worker_path(self) -> str:
+        """This worker's log file (path.<pid>.log)"""
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{os.getpid()}{ext}"
+
+    def _file(self) -> logging.Logger:
+        if self._file_logger is None:
+            with self._lock:
+                if self._file_logger is None:
+                    path = self.worker_path()
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    handler = RotatingFileHandler(
+                        path, maxBytes=self.max_bytes, backupCount=self.backup_count
+                    )
+                    handler.setFormatter(logging.Formatter("%(message)s"))
+                    file_logger = logging.getLogger("app.slow_queries")
+                    file_logger.setLevel(logging.INFO)
+                    file_logger.propagate = False
+                    file_logger.addHandler(handler)
+                    self._file_logger = file_logger
+        return self._file_logger
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Latest entries recorded by this worker, newest first"""
+        with self._lock:
+            entries = list(self._recent)
+        return entries[::-1][:limit]
+
+
+# Singleton instance
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_MS,
+    sample_rate=settings.SLOW_QUERY_SAMPLE_RATE,
+    path=settings.SLOW_QUERY_LOG_PATH,
+    max_bytes=settings.SLOW_QUERY_LOG_MAX_MB * 1024 * 1024,
+    backup_count=settings.SLOW_QUERY_LOG_BACKUPS
+)
@@ -0,0 +1,32 @@
+"""
+Smart Link Hub - Stream Utility
+File-like helpers for building streamed responses
+"""
+import io
+from typing import List
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable file object that hands back whatever was written since the last drain"""
+    
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
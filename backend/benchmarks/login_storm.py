@@ -0,0 +1,99 @@
+"""
+Smart Link Hub - Login Storm Benchmark
+
+Measures the latency of a cheap public route while a burst of password
+verifications runs, once with bcrypt called inline on the event loop (the
+previous behaviour) and once through the bounded password hashing pool.
+
+Usage (from backend/):
+    python -m benchmarks.login_storm [--logins 40] [--requests 200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.services.password_hasher import PasswordHasher, PasswordHasherBusyError
+from app.utils.security import hash_password, verify_password
+
+PASSWORD = "Passw0rd!benchmark"
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+async def public_latencies(client: httpx.AsyncClient, count: int, interval: float = 0.01) -> list:
+    """
+    Issue requests on a fixed schedule and time each one from when it was
+    due, so time spent waiting for a blocked event loop is included
+    """
+    timings = []
+    start = time.perf_counter()
+    for i in range(count):
+        due = start + i * interval
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        await client.get("/ping")
+        timings.append((time.perf_counter() - due) * 1000)
+    return timings
+
+
+async def inline_login(hashed: str) -> str:
+    verify_password(PASSWORD, hashed)
+    return "ok"
+
+
+async def pooled_login(hasher: PasswordHasher, hashed: str) -> str:
+    try:
+        await hasher.verify(PASSWORD, hashed)
+        return "ok"
+    except PasswordHasherBusyError:
+        return "503"
+
+
+async def run(name: str, login, logins: int, requests: int, hashed: str) -> None:
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        storm = asyncio.gather(*(login(hashed) for _ in range(logins)))
+        timings = await public_latencies(client, requests)
+        results = await storm
+        elapsed = time.perf_counter() - started
+
+    timings.sort()
+    print(
+        f"{name:<8} p50 {statistics.median(timings):8.2f} ms"
+        f"  p99 {timings[int(len(timings) * 0.99) - 1]:8.2f} ms"
+        f"  max {timings[-1]:8.2f} ms"
+        f"  logins ok {results.count('ok')}/{logins} ({results.count('503')} shed)"
+        f"  total {elapsed:.1f} s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--max-pending", type=int, default=32)
+    args = parser.parse_args()
+
+    hashed = hash_password(PASSWORD)
+    hasher = PasswordHasher(args.workers, args.max_pending)
+
+    asyncio.run(run("idle", lambda h: asyncio.sleep(0, "ok"), 0, args.requests, hashed))
+    asyncio.run(run("inline", inline_login, args.logins, args.requests, hashed))
+    asyncio.run(run("pooled", lambda h: pooled_login(hasher, h), args.logins, args.requests, hashed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Smart Link Hub - QR Rendering Benchmark
+
+Compares render time and output size of the previous QR pipeline
+(box_size=10 + resize, PNG only) with native-resolution PNG and SVG output.
+
+Usage (from backend/):
+    python -m benchmarks.qr_render [--iterations 50]
+"""
+import argparse
+import io
+import statistics
+import time
+
+import qrcode
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles.moduledrawers import RoundedModuleDrawer
+from qrcode.image.styles.colormasks import SolidFillColorMask
+
+from app.services.qr_service import generate_qr_code
+
+URL = "http://localhost:3001/my-campaign-hub"
+SIZES = (128, 256, 512)
+FG, BG = "#000000", "#FFFFFF"
+
+
+def legacy_render(url: str, size: int, fg_color: str, bg_color: str) -> bytes:
+    """The original pipeline: fixed 10px modules, then resample"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_H,
+        box_size=10,
+        border=2,
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+    rgb = lambda c: tuple(int(c.lstrip("#")[i:i + 2], 16) for i in (0, 2, 4))  # noqa: E731
+    img = qr.make_image(
+        image_factory=StyledPilImage,
+        module_drawer=RoundedModuleDrawer(),
+        color_mask=SolidFillColorMask(back_color=rgb(bg_color), front_color=rgb(fg_color))
+    )
+    img = img.resize((size, size))
+    buffer = io.BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def measure(render, iterations: int):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        content = render()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    variants = {
+        "legacy png": lambda size: legacy_render(URL, size, FG, BG),
+        "native png": lambda size: generate_qr_code(URL, size, "png", FG, BG),
+        "svg": lambda size: generate_qr_code(URL, size, "svg", FG, BG),
+    }
+
+    print(f"{'variant':<12} {'size':>5} {'median ms':>10} {'bytes':>8}")
+    for size in SIZES:
+        for name, render in variants.items():
+            ms, length = measure(lambda: render(size), args.iterations)
+            print(f"{name:<12} {size:>5} {ms:>10.2f} {length:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Smart Link Hub - Rate Limiter Benchmark
+
+Multi-threaded throughput of the previous single-lock rate limiter (two
+defaultdicts behind one global Lock) against the lock-striped token bucket
+and GCRA limiters, plus resident memory per key.
+
+Usage (from backend/):
+    python -m benchmarks.rate_limiter [--threads 1 4 8] [--checks 200000] [--keys 10000]
+"""
+import argparse
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from app.utils.rate_limiter import GCRALimiter, RateLimiter
+
+
+class LegacyRateLimiter:
+    """The original implementation, kept verbatim for comparison"""
+
+    def __init__(self, requests_per_minute: int = 60, burst_size: int = 10):
+        self.rate = requests_per_minute / 60.0
+        self.burst_size = burst_size
+        self.tokens: Dict[str, float] = defaultdict(lambda: float(burst_size))
+        self.last_update: Dict[str, float] = defaultdict(time.time)
+        self._lock = threading.Lock()
+
+    def is_allowed(self, key: str) -> Tuple[bool, int]:
+        with self._lock:
+            now = time.time()
+            elapsed = now - self.last_update[key]
+            self.tokens[key] = min(self.burst_size, self.tokens[key] + elapsed * self.rate)
+            self.last_update[key] = now
+            if self.tokens[key] >= 1:
+                self.tokens[key] -= 1
+                return True, 0
+            retry_after = int((1 - self.tokens[key]) / self.rate) + 1
+            return False, retry_after
+
+
+def throughput(limiter, threads: int, checks: int, keys: list) -> float:
+    """Checks per second of known keys with `threads` threads sharing `checks` calls"""
+    for key in keys:
+        limiter.is_allowed(key)
+    per_thread = checks // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset: int):
+        is_allowed = limiter.is_allowed
+        count = len(keys)
+        barrier.wait()
+        for i in range(per_thread):
+            is_allowed(keys[(offset + i * 7) % count])
+
+    workers = [threading.Thread(target=worker, args=(n * 997,)) for n in range(threads)]
+    for w in workers:
+        w.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for w in workers:
+        w.join()
+    return per_thread * threads / (time.perf_counter() - started)
+
+
+def first_seen(factory, keys: list) -> Tuple[float, float]:
+    """(ns per check, bytes per key) when every key is new"""
+    limiter = factory()
+    started = time.perf_counter()
+    for key in keys:
+        limiter.is_allowed(key)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    limiter = factory()
+    before = tracemalloc.get_traced_memory()[0]
+    for key in keys:
+        limiter.is_allowed(key)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed / len(keys) * 1e9, (after - before) / len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--keys", type=int, default=10000)
+    args = parser.parse_args()
+
+    keys = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(args.keys)]
+    variants = {
+        "legacy": lambda: LegacyRateLimiter(60, 50),
+        "striped": lambda: RateLimiter(60, 50),
+        "gcra": lambda: GCRALimiter(60, 50),
+    }
+
+    print(f"{'variant':<8} {'threads':>7} {'checks/s':>12}")
+    for threads in args.threads:
+        for name, factory in variants.items():
+            rate = throughput(factory(), threads, args.checks, keys)
+            print(f"{name:<8} {threads:>7} {rate:>12,.0f}")
+
+    print()
+    print(f"{'variant':<8} {'new key ns':>10} {'bytes/key':>10}")
+    for name, factory in variants.items():
+        ns, size = first_seen(factory, keys)
+        print(f"{name:<8} {ns:>10.0f} {size:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Smart Link Hub - Export Service Tests
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from app.services.export_service import _columnar_schema, _encode_batch
+
+
+def _visit(device_type, country):
+    return ("hub", datetime(2024, 1, 1, tzinfo=timezone.utc), device_type, country, "1.2.3.4", "ua")
+
+
+def test_arrow_file_with_several_batches():
+    """Batches with different device/country values share one dictionary"""
+    schema = _columnar_schema("visits")
+    dictionaries = {"device_type": ["desktop", "mobile"], "country": ["DE", "FR", "US"]}
+    batches = [
+        [_visit("mobile", "US"), _visit("mobile", "DE")],
+        [_visit("desktop", "FR"), _visit(None, None)],
+    ]
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, schema) as writer:
+        for rows in batches:
+            writer.write_batch(_encode_batch(schema, rows, dictionaries))
+
+    table = pa.ipc.open_file(sink.getvalue()).read_all()
+    assert table.num_rows == 4
+    assert table.column("device_type").to_pylist() == ["mobile", "mobile", "desktop", None]
+    assert table.column("country").to_pylist() == ["US", "DE", "FR", None]